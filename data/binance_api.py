@@ -12,10 +12,10 @@ from typing import Dict, List, Optional, Any
 import aiohttp
 import logging
 from datetime import datetime
-import json
 
 from config.api_config import API_CONFIG
 from config.exchanges import EXCHANGE_CONFIG
+from . import json_codec
 
 logger = logging.getLogger(__name__)
 
@@ -74,16 +74,17 @@ class BinanceAPI:
     
     async def _rate_limit_wait(self):
         """请求频率限制"""
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
+        current_time = time.monotonic()
         
         # 计算最小请求间隔
         min_interval = 60.0 / self.rate_limit
         
-        if time_since_last_request < min_interval:
-            await asyncio.sleep(min_interval - time_since_last_request)
+        # 先预约发送时间再等待，并发请求也会依次排开
+        scheduled_time = max(current_time, self.last_request_time + min_interval)
+        self.last_request_time = scheduled_time
         
-        self.last_request_time = time.time()
+        if scheduled_time > current_time:
+            await asyncio.sleep(scheduled_time - current_time)
     
     async def _make_request(self, method: str, endpoint: str, 
                            params: Dict[str, Any] = None, 
@@ -121,7 +122,7 @@ class BinanceAPI:
     async def _handle_response(self, response) -> Dict[str, Any]:
         """处理HTTP响应"""
         if response.status == 200:
-            data = await response.json()
+            data = await response.json(loads=json_codec.loads)
             
             # 检查币安API错误码
             if 'code' in data and data['code'] != 0:
@@ -304,7 +305,7 @@ class BinanceWebSocket:
         while self.is_connected:
             try:
                 message = await self.websocket.recv()
-                data = json.loads(message)
+                data = json_codec.loads(message)
                 callback(data)
                 
             except websockets.exceptions.ConnectionClosed:
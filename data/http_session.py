@@ -0,0 +1,59 @@
+"""
+共享HTTP会话
+按交易所基础URL复用aiohttp会话和连接池，避免每个客户端重复DNS解析和TLS握手
+"""
+
+import asyncio
+import logging
+from typing import Dict, Tuple
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# 会话绑定创建时的事件循环，因此按 (事件循环, 基础URL) 缓存；
+# 在另一个事件循环中（如多次asyncio.run）获取时会创建新的会话
+_SESSIONS: Dict[Tuple[asyncio.AbstractEventLoop, str], aiohttp.ClientSession] = {}
+_REFCOUNTS: Dict[Tuple[asyncio.AbstractEventLoop, str], int] = {}
+
+
+def _create_session() -> aiohttp.ClientSession:
+    """创建带连接池的HTTP会话"""
+    connector = aiohttp.TCPConnector(
+        limit=0,
+        limit_per_host=32,
+        ttl_dns_cache=300,
+        enable_cleanup_closed=True,
+        keepalive_timeout=60
+    )
+    timeout = aiohttp.ClientTimeout(total=30)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+async def get_shared_session(base_url: str) -> aiohttp.ClientSession:
+    """获取当前事件循环的共享HTTP会话（引用计数加一）"""
+    key = (asyncio.get_running_loop(), base_url)
+    session = _SESSIONS.get(key)
+    if session is None or session.closed:
+        session = _create_session()
+        _SESSIONS[key] = session
+        _REFCOUNTS[key] = 0
+        logger.debug(f"创建共享HTTP会话: {base_url}")
+    
+    _REFCOUNTS[key] += 1
+    return session
+
+
+async def release_shared_session(base_url: str):
+    """释放当前事件循环的共享HTTP会话，引用计数归零时关闭"""
+    key = (asyncio.get_running_loop(), base_url)
+    count = _REFCOUNTS.get(key, 0) - 1
+    if count > 0:
+        _REFCOUNTS[key] = count
+        return
+    
+    _REFCOUNTS.pop(key, None)
+    session = _SESSIONS.pop(key, None)
+    if session and not session.closed:
+        await session.close()
+        logger.debug(f"关闭共享HTTP会话: {base_url}")
@@ -4,13 +4,12 @@
 """
 
 import asyncio
+import random
 import time
 import hmac
-import hashlib
 import base64
-import json
-from typing import Dict, List, Optional, Any
-import aiohttp
+import urllib.parse
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 import logging
 from datetime import datetime
 
@@ -21,9 +20,21 @@ except ImportError:
 
 from config.api_config import API_CONFIG
 from config.exchanges import EXCHANGE_CONFIG
+from . import json_codec
+from .http_session import get_shared_session, release_shared_session
 
 logger = logging.getLogger(__name__)
 
+# 私有WebSocket登录签名的固定部分
+OKX_VERIFY_SUFFIX = b'GET/users/self/verify'
+
+# WebSocket断线重连退避时间（秒）
+RECONNECT_BASE_DELAY = 1.0
+RECONNECT_MAX_DELAY = 30.0
+
+# 交易产品信息变化很慢，缓存1小时
+INSTRUMENTS_CACHE_TTL = 3600
+
 
 class OKXAPI:
     """欧意API实现类"""
@@ -45,6 +56,9 @@ class OKXAPI:
         self.rate_limit = self.config.rate_limit
         self.last_request_time = 0
         
+        # 幂等公共接口的TTL缓存: key -> (缓存时间, 结果)
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+        
     async def __aenter__(self):
         await self._initialize_session()
         return self
@@ -53,14 +67,14 @@ class OKXAPI:
         await self._close_session()
     
     async def _initialize_session(self):
-        """初始化HTTP会话"""
-        timeout = aiohttp.ClientTimeout(total=30)
-        self.session = aiohttp.ClientSession(timeout=timeout)
+        """初始化HTTP会话（同一基础URL共享连接池）"""
+        self.session = await get_shared_session(self.base_url)
     
     async def _close_session(self):
-        """关闭HTTP会话"""
+        """释放HTTP会话"""
         if self.session:
-            await self.session.close()
+            self.session = None
+            await release_shared_session(self.base_url)
     
     def _sign_request(self, timestamp: str, method: str, 
                      request_path: str, body: str = "") -> Dict[str, str]:
@@ -88,16 +102,17 @@ class OKXAPI:
     
     async def _rate_limit_wait(self):
         """请求频率限制"""
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
+        current_time = time.monotonic()
         
         # 计算最小请求间隔
         min_interval = 60.0 / self.rate_limit
         
-        if time_since_last_request < min_interval:
-            await asyncio.sleep(min_interval - time_since_last_request)
+        # 先预约发送时间再等待，并发请求也会依次排开
+        scheduled_time = max(current_time, self.last_request_time + min_interval)
+        self.last_request_time = scheduled_time
         
-        self.last_request_time = time.time()
+        if scheduled_time > current_time:
+            await asyncio.sleep(scheduled_time - current_time)
     
     async def _make_request(self, method: str, endpoint: str, 
                            params: Dict[str, Any] = None, 
@@ -106,31 +121,30 @@ class OKXAPI:
         try:
             await self._rate_limit_wait()
             
-            url = f"{self.base_url}{endpoint}"
-            
+            request_path = endpoint
             headers = {}
             body = ""
             
+            if method.upper() == 'GET' and params:
+                # GET参数只编码一次，签名路径与实际请求URL完全一致
+                request_path = f"{endpoint}?{urllib.parse.urlencode(params, doseq=True)}"
+            
+            if method.upper() in ['POST', 'PUT'] and params:
+                # 请求体只序列化一次，签名与实际发送的内容保持一致
+                body = json_codec.dumps(params)
+            
             if signed:
                 timestamp = str(int(time.time()))
-                
-                if method.upper() == 'GET' and params:
-                    # GET请求将参数放在URL中
-                    query_string = '&'.join([f"{k}={v}" for k, v in params.items()])
-                    request_path = f"{endpoint}?{query_string}"
-                else:
-                    request_path = endpoint
-                    
-                if method.upper() in ['POST', 'PUT'] and params:
-                    body = json.dumps(params)
-                
                 headers = self._sign_request(timestamp, method, request_path, body)
             
+            url = f"{self.base_url}{request_path}"
+            
             if method.upper() == 'GET':
-                async with self.session.get(url, params=params, headers=headers) as response:
+                async with self.session.get(url, headers=headers) as response:
                     return await self._handle_response(response)
             elif method.upper() == 'POST':
-                async with self.session.post(url, json=params, headers=headers) as response:
+                headers.setdefault('Content-Type', 'application/json')
+                async with self.session.post(url, data=body, headers=headers) as response:
                     return await self._handle_response(response)
             elif method.upper() == 'DELETE':
                 async with self.session.delete(url, params=params, headers=headers) as response:
@@ -142,10 +156,22 @@ class OKXAPI:
             logger.error(f"请求失败: {e}")
             raise
     
+    async def _cached(self, key: str, ttl: float,
+                      coro_factory: Callable[[], Awaitable[Any]]) -> Any:
+        """在TTL内复用幂等请求的结果"""
+        now = time.monotonic()
+        entry = self._cache.get(key)
+        if entry and now - entry[0] < ttl:
+            return entry[1]
+        
+        result = await coro_factory()
+        self._cache[key] = (now, result)
+        return result
+    
     async def _handle_response(self, response) -> Dict[str, Any]:
         """处理HTTP响应"""
         if response.status == 200:
-            data = await response.json()
+            data = await response.json(loads=json_codec.loads)
             
             # 检查欧意API错误码
             if data.get('code') != '0':
@@ -298,7 +324,10 @@ class OKXAPI:
         endpoint = "/api/v5/public/instruments"
         params = {'instType': inst_type}
         
-        response = await self._make_request('GET', endpoint, params)
+        response = await self._cached(
+            f"instruments:{inst_type}", INSTRUMENTS_CACHE_TTL,
+            lambda: self._make_request('GET', endpoint, params)
+        )
         return response.get('data', [])
     
     async def get_system_time(self) -> int:
@@ -321,29 +350,54 @@ class OKXAPI:
 class OKXWebSocket:
     """欧意WebSocket客户端"""
     
-    def __init__(self, sandbox: bool = False):
+    def __init__(self, sandbox: bool = False, args: List[Dict[str, str]] = None):
         if sandbox:
             self.ws_url = "wss://wspap.okx.com:8443/ws/v5/public"
         else:
             self.ws_url = "wss://ws.okx.com:8443/ws/v5/public"
         
         self.private_ws_url = self.ws_url.replace('/public', '/private')
+        # K线等频道只在business端点提供，订阅时需连接该地址
+        self.business_ws_url = self.ws_url.replace('/public', '/business')
         self.websocket = None
         self.is_connected = False
+        
+        # 订阅和登录的不变部分只编码一次，重连时直接复用
+        self._sub_args = None
+        self._sub_frame = None
+        self._secret_bytes = None
+        self._login_key = None
+        self._private = False
+        
+        if args:
+            self._cache_subscribe_frame(args)
+    
+    def _cache_subscribe_frame(self, args: List[Dict[str, str]]):
+        """缓存订阅消息"""
+        self._sub_args = args
+        self._sub_frame = json_codec.dumps({
+            'op': 'subscribe',
+            'args': args
+        })
     
-    async def connect_public(self, args: List[Dict[str, str]]):
+    async def connect_public(self, args: List[Dict[str, str]] = None):
         """连接公共WebSocket"""
         try:
-            self.websocket = await websockets.connect(self.ws_url)
+            if args is not None and args != self._sub_args:
+                self._cache_subscribe_frame(args)
+            if self._sub_frame is None:
+                raise ValueError("未指定订阅频道")
+            
+            # K线频道连接business端点，其余频道连接public端点
+            url = self.ws_url
+            if any(arg.get('channel', '').startswith('candle') for arg in self._sub_args):
+                url = self.business_ws_url
+            self.websocket = await websockets.connect(url)
             self.is_connected = True
+            self._private = False
             
             # 订阅频道
-            subscribe_msg = {
-                'op': 'subscribe',
-                'args': args
-            }
-            
-            await self.websocket.send(json.dumps(subscribe_msg))
+            await self.websocket.send(self._sub_frame)
             logger.info("欧意公共WebSocket连接成功")
             
         except Exception as e:
@@ -355,12 +409,16 @@ class OKXWebSocket:
         try:
             self.websocket = await websockets.connect(self.private_ws_url)
             self.is_connected = True
+            self._private = True
+            
+            # 登录（密钥只编码一次，仅时间戳和签名每次重新计算）
+            if self._login_key != (api_key, passphrase, secret_key):
+                self._login_key = (api_key, passphrase, secret_key)
+                self._secret_bytes = secret_key.encode()
             
-            # 登录
             timestamp = str(int(time.time()))
-            message = timestamp + 'GET' + '/users/self/verify'
             signature = base64.b64encode(
-                hmac.new(secret_key.encode(), message.encode(), hashlib.sha256).digest()
+                hmac.digest(self._secret_bytes, timestamp.encode() + OKX_VERIFY_SUFFIX, 'sha256')
             ).decode()
             
             login_msg = {
@@ -373,7 +431,7 @@ class OKXWebSocket:
                 }]
             }
             
-            await self.websocket.send(json.dumps(login_msg))
+            await self.websocket.send(json_codec.dumps(login_msg))
             logger.info("欧意私有WebSocket连接成功")
             
         except Exception as e:
@@ -381,25 +439,40 @@ class OKXWebSocket:
             raise
     
     async def receive_messages(self, callback):
-        """接收消息并回调"""
+        """接收消息并回调，连接断开时自动重连"""
         while self.is_connected:
             try:
                 message = await self.websocket.recv()
-                data = json.loads(message)
+                data = json_codec.loads(message)
                 callback(data)
                 
             except websockets.exceptions.ConnectionClosed:
-                logger.error("WebSocket连接已关闭")
-                self.is_connected = False
-                break
+                if not self.is_connected:
+                    break
+                logger.warning("WebSocket连接已关闭，准备重连")
+                await self._reconnect()
             except Exception as e:
                 logger.error(f"处理WebSocket消息失败: {e}")
     
+    async def _reconnect(self):
+        """按指数退避重连，私有连接重新登录"""
+        backoff = RECONNECT_BASE_DELAY
+        while self.is_connected:
+            await asyncio.sleep(backoff)
+            try:
+                if self._private:
+                    await self.connect_private(*self._login_key)
+                else:
+                    await self.connect_public()
+                return
+            except Exception:
+                backoff = min(backoff * 2, RECONNECT_MAX_DELAY) + random.random()
+    
     async def close(self):
         """关闭连接"""
         if self.websocket:
-            await self.websocket.close()
             self.is_connected = False
+            await self.websocket.close()
             logger.info("欧意WebSocket连接已关闭")
 
 
@@ -8,23 +8,39 @@ import time
 import logging
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 
 from .base_collector import BaseCollector
-from data.exchange_client import ExchangeClientFactory, ExchangeType
+from .websocket_collector import WebSocketCollector
+from data.exchange_client import ExchangeClientFactory, ExchangeType, UnifiedTicker
 
 logger = logging.getLogger(__name__)
 
+# K线中需要的数值列及其在原始数据中的位置
+KLINE_NUMERIC_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume',
+                         'quote_asset_volume', 'number_of_trades']
+KLINE_NUMERIC_INDICES = [0, 1, 2, 3, 4, 5, 7, 8]
+
+# 采集结果中K线的结构化数组类型
+KLINE_DTYPE = np.dtype([('ts', 'i8'), ('o', 'f8'), ('h', 'f8'),
+                        ('l', 'f8'), ('c', 'f8'), ('v', 'f8')])
+
 
 class RESTCollector(BaseCollector):
     """REST API数据采集器"""
     
-    def __init__(self, exchange: str, symbols: List[str], exchange_type: ExchangeType = ExchangeType.BINANCE):
+    def __init__(self, exchange: str, symbols: List[str], exchange_type: ExchangeType = ExchangeType.BINANCE,
+                 ws_collector: Optional[WebSocketCollector] = None):
         super().__init__(exchange, symbols)
         self.exchange_type = exchange_type
+        self.ws_collector = ws_collector  # K线推送正常时直接使用其缓冲区，否则走REST
+        self._symbol_set = set(symbols)
+        self._klines: Dict[str, np.ndarray] = {}  # 每个交易对最新的K线数组
         self.client = None
         self.collection_interval = 60  # 默认60秒采集一次
         self.last_collection_time = 0
+        self._next_collection_time = 0.0  # 基于time.monotonic()
         
     async def start(self):
         """启动数据采集"""
@@ -59,15 +75,16 @@ class RESTCollector(BaseCollector):
         """数据采集循环"""
         while self.is_running:
             try:
-                current_time = time.time()
+                current_time = time.monotonic()
                 
                 # 检查是否到了采集时间
-                if current_time - self.last_collection_time >= self.collection_interval:
+                if current_time >= self._next_collection_time:
+                    self._next_collection_time = current_time + self.collection_interval
                     await self._collect_data()
-                    self.last_collection_time = current_time
+                    self.last_collection_time = time.time()
                 
-                # 等待下一次检查
-                await asyncio.sleep(5)
+                # 直接等待到下一次采集时间
+                await asyncio.sleep(max(0, self._next_collection_time - time.monotonic()))
                 
             except Exception as e:
                 logger.error(f"数据采集循环错误: {e}")
@@ -76,66 +93,115 @@ class RESTCollector(BaseCollector):
     async def _collect_data(self):
         """采集数据"""
         try:
-            for symbol in self.symbols:
-                try:
-                    # 获取ticker数据
-                    ticker = await self.client.get_ticker(symbol)
-                    
-                    # 获取K线数据
-                    klines = await self.client.get_klines(symbol, "1m", limit=100)
-                    
-                    # 转换K线数据
-                    kline_df = self._convert_klines_to_dataframe(klines)
-                    
-                    # 组合数据
-                    market_data = {
-                        "exchange": self.exchange,
-                        "symbol": symbol,
-                        "timestamp": ticker.timestamp,
-                        "price": ticker.price,
-                        "volume": ticker.volume,
-                        "price_change": ticker.price_change,
-                        "price_change_percent": ticker.price_change_percent,
-                        "high": ticker.high,
-                        "low": ticker.low,
-                        "open": ticker.open,
-                        "klines": kline_df.to_dict('records') if not kline_df.empty else []
-                    }
-                    
-                    # 存储数据
-                    self.collected_data[symbol] = market_data
-                    
-                    # 通知回调
-                    self.notify_callbacks(market_data)
-                    
-                    logger.debug(f"采集到数据: {symbol} - {ticker.price}")
-                    
-                except Exception as e:
-                    logger.error(f"采集 {symbol} 数据失败: {e}")
+            # 一次请求获取全部行情，再按关注的交易对过滤
+            try:
+                all_tickers = await self.client.get_tickers()
+                tickers_by_symbol = {
+                    ticker.symbol: ticker for ticker in all_tickers
+                    if ticker.symbol in self._symbol_set
+                }
+            except Exception as e:
+                logger.warning(f"批量获取行情失败，改为逐个获取: {e}")
+                tickers_by_symbol = {}
+            
+            # 各交易对并发采集，单个交易对失败不影响整批
+            results = await asyncio.gather(
+                *[self._collect_one(symbol, tickers_by_symbol.get(symbol))
+                  for symbol in self.symbols],
+                return_exceptions=True
+            )
+            
+            for symbol, result in zip(self.symbols, results):
+                if isinstance(result, Exception):
+                    logger.error(f"采集 {symbol} 数据失败: {result}")
                     
         except Exception as e:
             logger.error(f"数据采集失败: {e}")
     
+    async def _collect_one(self, symbol: str, ticker: Optional[UnifiedTicker] = None):
+        """采集单个交易对数据"""
+        if ticker is None:
+            # 批量行情中缺少该交易对时，单独获取ticker
+            ticker, klines = await asyncio.gather(
+                self.client.get_ticker(symbol),
+                self._get_klines(symbol)
+            )
+        else:
+            klines = await self._get_klines(symbol)
+        
+        # 转换K线数据（结构化数组，下游可直接按列使用）
+        kline_array = self._convert_klines_to_array(klines)
+        self._klines[symbol] = kline_array
+        
+        # 组合数据
+        market_data = {
+            "exchange": self.exchange,
+            "symbol": symbol,
+            "timestamp": ticker.timestamp,
+            "price": ticker.price,
+            "volume": ticker.volume,
+            "price_change": ticker.price_change,
+            "price_change_percent": ticker.price_change_percent,
+            "high": ticker.high,
+            "low": ticker.low,
+            "open": ticker.open,
+            "klines": kline_array
+        }
+        
+        # 存储数据
+        self.collected_data[symbol] = market_data
+        
+        # 通知回调
+        self.notify_callbacks(market_data)
+        
+        logger.debug(f"采集到数据: {symbol} - {ticker.price}")
+    
+    async def _get_klines(self, symbol: str, limit: int = 100) -> List[List[Any]]:
+        """获取1分钟K线（按时间升序），K线推送正常时使用WebSocket缓冲区"""
+        if self.ws_collector is not None:
+            candles = self.ws_collector.get_live_candles(symbol, limit)
+            if candles:
+                return candles
+        
+        # 各交易所REST返回顺序不同（欧意为新到旧），统一为升序
+        klines = sorted(await self.client.get_klines(symbol, "1m", limit=limit),
+                        key=lambda k: int(k[0]))
+        
+        if self.ws_collector is not None:
+            self.ws_collector.seed_candles(symbol, klines)
+        
+        return klines
+    
+    def _convert_klines_to_array(self, klines: List[List[Any]]) -> np.ndarray:
+        """转换K线数据为结构化数组(ts, o, h, l, c, v)"""
+        result = np.empty(len(klines), dtype=KLINE_DTYPE)
+        if not klines:
+            return result
+        
+        values = np.asarray(klines, dtype=object)[:, :6].astype(np.float64)
+        result['ts'] = values[:, 0]
+        for i, name in enumerate(KLINE_DTYPE.names[1:], start=1):
+            result[name] = values[:, i]
+        
+        return result
+    
     def _convert_klines_to_dataframe(self, klines: List[List[Any]]) -> pd.DataFrame:
         """转换K线数据为DataFrame"""
         if not klines:
             return pd.DataFrame()
         
-        # K线数据格式: [timestamp, open, high, low, close, volume, ...]
-        df = pd.DataFrame(klines, columns=[
-            'timestamp', 'open', 'high', 'low', 'close', 'volume',
-            'close_time', 'quote_asset_volume', 'number_of_trades',
-            'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
-        ])
+        # K线数据格式: [timestamp, open, high, low, close, volume, close_time,
+        #              quote_asset_volume, number_of_trades, ...]
+        # 一次性转换为float64数组，避免逐列pd.to_numeric
+        # 注: 字符串解析已在numpy的C循环中完成；Numba无法直接解析str，
+        # 先转定长字节数组的开销大于解析本身，因此不使用JIT内核
+        arr = np.asarray(klines, dtype=object)
+        values = arr[:, KLINE_NUMERIC_INDICES].astype(np.float64)
         
-        # 转换数据类型
-        numeric_columns = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 
-                         'quote_asset_volume', 'number_of_trades']
-        for col in numeric_columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+        df = pd.DataFrame(values, columns=KLINE_NUMERIC_COLUMNS)
         
         # 转换时间戳为datetime
-        df['datetime'] = pd.to_datetime(df['timestamp'], unit='ms')
+        df['datetime'] = pd.to_datetime(values[:, 0].astype(np.int64), unit='ms')
         df.set_index('datetime', inplace=True)
         
         return df
@@ -220,6 +286,10 @@ class RESTCollector(BaseCollector):
         }
 
 
+# 兼容旧名称（data/__init__.py 及脚本中使用）
+RestCollector = RESTCollector
+
+
 # 使用示例
 async def example_usage():
     """使用示例"""
@@ -2,19 +2,71 @@
 WebSocket数据采集器 - 支持币安、欧意等交易所
 """
 import asyncio
-import json
 import logging
-from typing import Any, Dict, List, Optional
+import random
+import time
+from collections import deque
+from operator import itemgetter
+from typing import Any, Deque, Dict, List, Optional
 
 try:
     import websockets
 except ImportError:
     websockets = None
 
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
 from .base_collector import BaseCollector
+from . import json_codec
 
 logger = logging.getLogger(__name__)
 
+# 每个交易对在内存中保留的K线数量
+CANDLE_BUFFER_SIZE = 200
+# K线周期（毫秒）
+CANDLE_INTERVAL_MS = 60_000
+# 缓冲区视为实时的条件：最新K线开盘时间距今不超过两个周期（即其收盘时间在一个周期之内）
+CANDLE_MAX_AGE_MS = 2 * CANDLE_INTERVAL_MS
+
+# 推送K线的交易所；欧意K线频道只在business端点提供
+CANDLE_STREAM_URLS = {
+    "okx": ("/ws/v5/public", "/ws/v5/business")
+}
+
+# 断线重连退避时间（秒）
+RECONNECT_BASE_DELAY = 1.0
+RECONNECT_MAX_DELAY = 30.0
+
+# 行情推送中需要的字段
+_BINANCE_TICKER_FIELDS = itemgetter("e", "s", "c", "v", "p", "P", "E")
+_OKX_TICKER_FIELDS = itemgetter("instId", "last", "vol24h", "sodUtc0", "ts")
+
+# 待分发数据队列长度
+DISPATCH_QUEUE_SIZE = 10000
+
+# 各交易所行情推送消息的特征片段
+MESSAGE_MARKERS = {
+    "binance": ('"e":"24hrTicker"',),
+    "okx": ('"channel":"tickers"',)
+}
+CANDLE_MESSAGE_MARKER = '"channel":"candle1m"'
+
+if msgspec is not None:
+    class OKXTicker(msgspec.Struct):
+        """欧意ticker推送（字符串数值直接解码为float）"""
+        instId: str
+        last: float
+        vol24h: float
+        sodUtc0: float
+        ts: int
+    
+    class OKXTickerMessage(msgspec.Struct):
+        """欧意tickers频道推送消息"""
+        data: List[OKXTicker]
+
 
 class WebSocketCollector(BaseCollector):
     """WebSocket实时数据采集器"""
@@ -24,47 +76,73 @@ class WebSocketCollector(BaseCollector):
         self.websocket_url = websocket_url
         self.websocket = None
         self.subscription_map = {
-            "binance": self._subscribe_binance,
-            "okx": self._subscribe_okx
+            "binance": self._build_binance_subscription,
+            "okx": self._build_okx_subscription
         }
+        # 1分钟K线环形缓冲区（按时间升序），只有推送K线的交易所才会持续更新
+        self.candles: Dict[str, Deque[List[Any]]] = {
+            symbol: deque(maxlen=CANDLE_BUFFER_SIZE) for symbol in symbols
+        }
+        self.streams_candles = exchange in CANDLE_STREAM_URLS
+        self.candle_websocket = None
+        self._candle_url = None
+        self._candle_sub_frame = None
+        if self.streams_candles:
+            public_path, business_path = CANDLE_STREAM_URLS[exchange]
+            self._candle_url = websocket_url.replace(public_path, business_path)
+            self._candle_sub_frame = json_codec.dumps(self._build_okx_candle_subscription())
+        
+        # 订阅消息在构造时编码一次，连接/重连时直接发送
+        builder = self.subscription_map.get(exchange)
+        self._sub_frame = json_codec.dumps(builder()) if builder else None
+        
+        # 需要处理的消息所含的特征片段，用于在解析前过滤
+        self._markers = MESSAGE_MARKERS.get(exchange, ())
+        self._byte_markers = tuple(marker.encode() for marker in self._markers)
+        
+        # 欧意ticker消息直接解码为类型化结构，跳过dict构造和float转换
+        self._okx_ticker_decoder = None
+        if msgspec is not None and exchange == "okx":
+            self._okx_ticker_decoder = msgspec.json.Decoder(OKXTickerMessage, strict=False)
+        
+        # 接收循环只负责入队，回调由独立的分发任务执行
+        self._queue: Optional[asyncio.Queue] = None
+        self._dispatcher_task: Optional[asyncio.Task] = None
     
-    async def _subscribe_binance(self):
-        """订阅币安WebSocket"""
-        streams = [f"{symbol.lower()}@ticker" for symbol in self.symbols]
-        subscribe_msg = {
+    def _build_binance_subscription(self) -> Dict[str, Any]:
+        """构建币安订阅消息"""
+        return {
             "method": "SUBSCRIBE",
-            "params": streams,
+            "params": [f"{symbol.lower()}@ticker" for symbol in self.symbols],
             "id": 1
         }
-        await self.websocket.send(json.dumps(subscribe_msg))
-    
-    async def _subscribe_okx(self):
-        """订阅欧意WebSocket"""
-        args = []
-        for symbol in self.symbols:
-            args.append({
-                "channel": "tickers",
-                "instId": symbol
-            })
-        
-        subscribe_msg = {
+    
+    def _build_okx_subscription(self) -> Dict[str, Any]:
+        """构建欧意订阅消息"""
+        return {
+            "op": "subscribe",
+            "args": [{"channel": "tickers", "instId": symbol} for symbol in self.symbols]
+        }
+    
+    def _build_okx_candle_subscription(self) -> Dict[str, Any]:
+        """构建欧意K线订阅消息（business端点）"""
+        return {
             "op": "subscribe",
-            "args": args
+            "args": [{"channel": "candle1m", "instId": symbol} for symbol in self.symbols]
         }
-        await self.websocket.send(json.dumps(subscribe_msg))
     
     async def start(self):
         """启动WebSocket连接"""
         try:
-            self.websocket = await websockets.connect(self.websocket_url)
+            await self._connect()
             self.is_running = True
             
-            # 订阅数据
-            if self.exchange in self.subscription_map:
-                await self.subscription_map[self.exchange]()
-            
-            # 开始接收数据
+            # 开始分发和接收数据
+            self._queue = asyncio.Queue(maxsize=DISPATCH_QUEUE_SIZE)
+            self._dispatcher_task = asyncio.create_task(self._dispatch_data())
             asyncio.create_task(self._receive_data())
+            if self.streams_candles:
+                asyncio.create_task(self._receive_candles())
             
             logger.info(f"WebSocket连接已启动: {self.exchange}")
             
@@ -72,24 +150,105 @@ class WebSocketCollector(BaseCollector):
             logger.error(f"WebSocket连接失败: {e}")
             self.is_running = False
     
+    async def _connect(self):
+        """建立连接并发送订阅消息"""
+        self.websocket = await websockets.connect(self.websocket_url)
+        
+        # 订阅数据
+        if self._sub_frame is not None:
+            await self.websocket.send(self._sub_frame)
+    
     async def _receive_data(self):
-        """接收WebSocket数据"""
-        while self.is_running and self.websocket:
+        """接收WebSocket数据，连接断开时按指数退避自动重连"""
+        backoff = RECONNECT_BASE_DELAY
+        while self.is_running:
+            try:
+                if self.websocket is None:
+                    await self._connect()
+                    logger.info(f"WebSocket已重新连接: {self.exchange}")
+                    backoff = RECONNECT_BASE_DELAY
+                
+                await self._consume_messages()
+                
+            except (websockets.exceptions.WebSocketException, OSError, asyncio.TimeoutError) as e:
+                if not self.is_running:
+                    break
+                logger.warning(f"WebSocket连接断开，{backoff:.1f}秒后重连: {e}")
+                self.websocket = None
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, RECONNECT_MAX_DELAY) + random.random()
+    
+    async def _receive_candles(self):
+        """接收K线推送（独立连接），连接断开时按指数退避自动重连"""
+        backoff = RECONNECT_BASE_DELAY
+        while self.is_running:
+            try:
+                self.candle_websocket = await websockets.connect(self._candle_url)
+                await self.candle_websocket.send(self._candle_sub_frame)
+                backoff = RECONNECT_BASE_DELAY
+                
+                while self.is_running:
+                    message = await self.candle_websocket.recv()
+                    if isinstance(message, bytes):
+                        message = message.decode()
+                    if CANDLE_MESSAGE_MARKER not in message:
+                        continue
+                    try:
+                        self._process_okx_candle(json_codec.loads(message))
+                    except (KeyError, TypeError, ValueError) as e:
+                        logger.error(f"处理K线推送错误: {e}")
+                
+            except (websockets.exceptions.WebSocketException, OSError, asyncio.TimeoutError) as e:
+                if not self.is_running:
+                    break
+                logger.warning(f"K线WebSocket连接断开，{backoff:.1f}秒后重连: {e}")
+                self.candle_websocket = None
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, RECONNECT_MAX_DELAY) + random.random()
+    
+    async def _consume_messages(self):
+        """持续读取当前连接上的消息"""
+        while self.is_running:
             try:
                 message = await self.websocket.recv()
-                data = json.loads(message)
                 
-                # 处理不同交易所的数据格式
-                processed_data = self._process_data(data)
+                # 心跳、订阅确认等无关消息直接跳过，不做JSON解析
+                markers = self._markers if isinstance(message, str) else self._byte_markers
+                if markers and not any(marker in message for marker in markers):
+                    continue
+                
+                processed_data = None
+                if self._okx_ticker_decoder is not None:
+                    processed_data = self._decode_okx_ticker(message)
+                
+                if processed_data is None:
+                    data = json_codec.loads(message)
+                    
+                    # 处理不同交易所的数据格式
+                    processed_data = self._process_data(data)
+                
                 if processed_data:
-                    self.notify_callbacks(processed_data)
+                    self._enqueue(processed_data)
                     
             except websockets.exceptions.ConnectionClosed:
-                logger.error("WebSocket连接已关闭")
-                break
+                raise
             except Exception as e:
                 logger.error(f"处理WebSocket数据错误: {e}")
     
+    def _enqueue(self, data: Dict[str, Any]):
+        """数据入队，队列满时丢弃最旧的数据"""
+        try:
+            self._queue.put_nowait(data)
+        except asyncio.QueueFull:
+            self._queue.get_nowait()
+            self._queue.put_nowait(data)
+    
+    async def _dispatch_data(self):
+        """从队列取出数据并通知回调"""
+        while True:
+            data = await self._queue.get()
+            self.notify_callbacks(data)
+    
     def _process_data(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """处理不同交易所的数据格式"""
         if self.exchange == "binance":
@@ -100,38 +259,115 @@ class WebSocketCollector(BaseCollector):
     
     def _process_binance_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """处理币安数据"""
-        if "e" in data and data["e"] == "24hrTicker":
-            return {
-                "exchange": "binance",
-                "symbol": data["s"],
-                "price": float(data["c"]),
-                "volume": float(data["v"]),
-                "price_change": float(data["p"]),
-                "price_change_percent": float(data["P"]),
-                "timestamp": data["E"]
-            }
-        return None
+        try:
+            event, symbol, last, volume, change, change_percent, ts = _BINANCE_TICKER_FIELDS(data)
+        except KeyError:
+            return None
+        
+        if event != "24hrTicker":
+            return None
+        
+        return {
+            "exchange": "binance",
+            "symbol": symbol,
+            "price": float(last),
+            "volume": float(volume),
+            "price_change": float(change),
+            "price_change_percent": float(change_percent),
+            "timestamp": ts
+        }
     
     def _process_okx_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """处理欧意数据"""
-        if "data" in data and len(data["data"]) > 0:
-            ticker = data["data"][0]
-            return {
-                "exchange": "okx",
-                "symbol": ticker["instId"],
-                "price": float(ticker["last"]),
-                "volume": float(ticker["vol24h"]),
-                "price_change": float(ticker["sodUtc0"]),
-                "price_change_percent": float(ticker["sodUtc0"]),
-                "timestamp": ticker["ts"]
-            }
-        return None
+        try:
+            item = data["data"][0]
+        except (KeyError, IndexError):
+            return None
+        
+        try:
+            inst_id, last, volume, sod, ts = _OKX_TICKER_FIELDS(item)
+        except (KeyError, TypeError):
+            return None
+        
+        return {
+            "exchange": "okx",
+            "symbol": inst_id,
+            "price": float(last),
+            "volume": float(volume),
+            "price_change": float(sod),
+            "price_change_percent": float(sod),
+            "timestamp": ts
+        }
+    
+    def _decode_okx_ticker(self, message) -> Optional[Dict[str, Any]]:
+        """类型化解码欧意ticker消息，非ticker消息返回None"""
+        try:
+            ticker = self._okx_ticker_decoder.decode(message).data[0]
+        except (msgspec.ValidationError, msgspec.DecodeError, IndexError):
+            return None
+        
+        return {
+            "exchange": "okx",
+            "symbol": ticker.instId,
+            "price": ticker.last,
+            "volume": ticker.vol24h,
+            "price_change": ticker.sodUtc0,
+            "price_change_percent": ticker.sodUtc0,
+            "timestamp": ticker.ts
+        }
+    
+    def _process_okx_candle(self, data: Dict[str, Any]):
+        """处理欧意K线推送，更新K线缓冲区"""
+        buffer = self.candles.get(data["arg"]["instId"])
+        if buffer is None:
+            return
+        
+        for candle in data.get("data", []):
+            ts = int(candle[0])
+            if buffer and int(buffer[-1][0]) == ts:
+                # 当前K线尚未收盘，覆盖最新一根
+                buffer[-1] = candle
+            elif not buffer or ts > int(buffer[-1][0]):
+                buffer.append(candle)
+    
+    def seed_candles(self, symbol: str, klines: List[List[Any]]):
+        """用REST获取的K线（按时间升序）填充缓冲区（冷启动或推送中断后）"""
+        buffer = self.candles.get(symbol)
+        if not self.streams_candles or buffer is None or not klines:
+            return
+        # 缓冲区已有同样新的数据时保留推送结果
+        if buffer and int(buffer[-1][0]) >= int(klines[-1][0]):
+            return
+        buffer.clear()
+        buffer.extend(klines)
+    
+    def get_candles(self, symbol: str, limit: int = None) -> List[List[Any]]:
+        """获取缓冲区中的K线数据（按时间升序）"""
+        candles = list(self.candles.get(symbol, ()))
+        if limit:
+            return candles[-limit:]
+        return candles
+    
+    def get_live_candles(self, symbol: str, limit: int = None) -> List[List[Any]]:
+        """获取实时K线；交易所不推送K线或推送已中断（最新K线过旧）时返回空列表"""
+        buffer = self.candles.get(symbol)
+        if not self.streams_candles or not buffer:
+            return []
+        if time.time() * 1000 - int(buffer[-1][0]) > CANDLE_MAX_AGE_MS:
+            return []
+        return self.get_candles(symbol, limit)
     
     async def stop(self):
         """停止WebSocket连接"""
         self.is_running = False
         if self.websocket:
             await self.websocket.close()
+        if self.candle_websocket:
+            await self.candle_websocket.close()
+            self.candle_websocket = None
+        if self._dispatcher_task:
+            self._dispatcher_task.cancel()
+            self._dispatcher_task = None
         logger.info("WebSocket连接已停止")
     
     def get_status(self) -> Dict[str, Any]:
@@ -0,0 +1,30 @@
+"""
+令牌桶限流器
+"""
+import asyncio
+import time
+
+
+class TokenBucket:
+    """异步令牌桶
+
+    以 rate 个/秒的速度补充令牌，最多积累 capacity 个，允许突发请求。
+    acquire 时先预扣令牌，不足部分按补充速度等待，
+    并发调用按到达顺序排队，无需加锁。
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+
+    async def acquire(self, cost: float = 1):
+        """获取令牌，不足时等待"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+        self.tokens -= cost
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
@@ -2,41 +2,150 @@
 交易引擎核心模块
 """
 import asyncio
-from typing import Dict, List, Optional
-import ccxt
+import contextlib
+import logging
+from typing import Dict, List, Optional, Tuple
+import aiohttp
+import ccxt.async_support as ccxt
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
-from core.database import get_db
+from core.database import get_db, db_manager, Exchange, Symbol, Trade
 from config.exchanges import ExchangeConfig
 from config.trading_config import TradingConfig
+from monitoring.prometheus_client import PrometheusClient
 from risk_management.risk_engine import RiskEngine
+from .rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# 各类接口的限流参数：(每秒补充令牌数, 令牌桶容量)
+ENDPOINT_RATE_LIMITS = {
+    "order": (10.0, 20.0),
+    "positions": (2.0, 5.0),
+    "balance": (2.0, 5.0),
+}
+
+# 交易记录批量写入参数
+TRADE_FLUSH_BATCH_SIZE = 500
+TRADE_FLUSH_INTERVAL = 0.1  # 秒
+# 写入队列的停止标记：写入任务写完当前批次后退出
+_TRADE_WAL_STOP = object()
+
+# 所有交易所共享的连接池上限
+HTTP_CONNECTION_LIMIT = 100
+
+# 批量下单时同时进行的订单数上限（不超过下单令牌桶容量，避免一次性涌入）
+BATCH_ORDER_CONCURRENCY = 10
+
 
 class TradingEngine:
     """交易引擎"""
     
-    def __init__(self):
+    def __init__(self, metrics: Optional[PrometheusClient] = None):
         self.exchange_config = ExchangeConfig()
         self.trading_config = TradingConfig()
         self.risk_engine = RiskEngine()
         self.active_exchanges: Dict[str, ccxt.Exchange] = {}
+        self.metrics = metrics
+        self._request_timer = metrics.request_timer if metrics else contextlib.nullcontext
+        self._throttles: Dict[Tuple[str, str], TokenBucket] = {}
+        # 写入队列在initialize中创建，绑定到实际运行的事件循环（Python 3.9在构造时绑定当前循环）
+        self._trade_wal: Optional[asyncio.Queue] = None
+        self._trade_writer_task: Optional[asyncio.Task] = None
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        self._sessions: List[aiohttp.ClientSession] = []
         
     async def initialize(self):
         """初始化交易引擎"""
+        # 所有交易所共用一个连接池，共享DNS缓存和keep-alive连接
+        self._connector = aiohttp.TCPConnector(
+            limit=HTTP_CONNECTION_LIMIT,
+            ttl_dns_cache=300
+        )
+        
         # 初始化交易所连接
         for exchange_name, config in self.exchange_config.exchanges.items():
             if config['enabled']:
+                session = aiohttp.ClientSession(connector=self._connector, connector_owner=False)
+                self._sessions.append(session)
+                
                 exchange_class = getattr(ccxt, exchange_name)
                 exchange = exchange_class({
                     'apiKey': config['api_key'],
                     'secret': config['api_secret'],
                     'sandbox': config['sandbox'],
-                    'enableRateLimit': True
+                    'session': session,
+                    # 由按接口划分的令牌桶限流，不使用ccxt的全局均匀限速
+                    'enableRateLimit': False
                 })
                 self.active_exchanges[exchange_name] = exchange
         
+        # 并发预加载市场信息，避免首笔订单隐式触发load_markets
+        await self._load_markets()
+        
+        # 启动交易记录批量写入任务
+        self._trade_wal = asyncio.Queue()
+        self._trade_writer_task = asyncio.create_task(self._trade_writer())
+        
         # 初始化风险引擎
         await self.risk_engine.initialize()
     
+    async def shutdown(self):
+        """停止交易引擎，写完队列中剩余的交易记录并关闭连接"""
+        if self._trade_writer_task:
+            # 不取消写入任务：放入停止标记，写入任务处理完标记之前的记录（包括已取出的当前批次）后退出
+            self._trade_wal.put_nowait(_TRADE_WAL_STOP)
+            await self._trade_writer_task
+            self._trade_writer_task = None
+        
+        # 停止标记之后才入队的记录（停止期间仍在完成的交易）
+        rows = []
+        while self._trade_wal is not None and not self._trade_wal.empty():
+            rows.append(self._trade_wal.get_nowait())
+        if rows:
+            await asyncio.get_running_loop().run_in_executor(None, self._flush_trades, rows)
+        
+        # 关闭交易所连接（会话由引擎持有，需自行关闭）
+        await asyncio.gather(
+            *[exchange.close() for exchange in self.active_exchanges.values()],
+            return_exceptions=True
+        )
+        for session in self._sessions:
+            await session.close()
+        self._sessions = []
+        if self._connector:
+            await self._connector.close()
+            self._connector = None
+    
+    def get_exchange(self, exchange: str) -> ccxt.Exchange:
+        """按名称获取已启用的交易所实例"""
+        try:
+            return self.active_exchanges[exchange]
+        except KeyError:
+            raise Exception(f"交易所 {exchange} 未配置或未启用")
+    
+    def _throttle(self, exchange: str, endpoint: str) -> TokenBucket:
+        """获取 (交易所, 接口) 对应的令牌桶"""
+        key = (exchange, endpoint)
+        bucket = self._throttles.get(key)
+        if bucket is None:
+            rate, capacity = ENDPOINT_RATE_LIMITS[endpoint]
+            bucket = self._throttles[key] = TokenBucket(rate, capacity)
+        return bucket
+    
+    async def _load_markets(self):
+        """并发加载所有已启用交易所的市场信息，单个交易所失败不影响其余交易所"""
+        names = list(self.active_exchanges)
+        results = await asyncio.gather(
+            *[self.active_exchanges[name].load_markets() for name in names],
+            return_exceptions=True
+        )
+        
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.error(f"加载 {name} 市场信息失败: {result}")
+    
     async def execute_trade(
         self,
         symbol: str,
@@ -45,9 +154,14 @@ class TradingEngine:
         order_type: str = "market",
         price: Optional[float] = None,
         exchange: str = "binance",
-        account_id: int = None
+        account_id: int = None,
+        exchange_instance: Optional[ccxt.Exchange] = None
     ) -> Dict:
-        """执行交易"""
+        """执行交易
+        
+        高频调用方可先通过 get_exchange 解析并缓存交易所实例，
+        再以 exchange_instance 传入，省去每次按名称查找。
+        """
         
         # 风险检查
         risk_check = await self.risk_engine.check_trade_risk(
@@ -62,22 +176,27 @@ class TradingEngine:
             raise Exception(f"交易被风险控制阻止: {risk_check['reason']}")
         
         # 获取交易所实例
-        exchange_instance = self.active_exchanges.get(exchange)
-        if not exchange_instance:
-            raise Exception(f"交易所 {exchange} 未配置或未启用")
+        if exchange_instance is None:
+            exchange_instance = self.get_exchange(exchange)
+        else:
+            exchange = exchange_instance.id
         
         try:
+            await self._throttle(exchange, "order").acquire()
+            
             # 执行交易
             if order_type == "market":
-                order = await exchange_instance.create_market_order(
-                    symbol, side, quantity
-                )
+                with self._request_timer():
+                    order = await exchange_instance.create_market_order(
+                        symbol, side, quantity
+                    )
             elif order_type == "limit":
                 if not price:
                     raise Exception("限价单需要指定价格")
-                order = await exchange_instance.create_limit_order(
-                    symbol, side, quantity, price
-                )
+                with self._request_timer():
+                    order = await exchange_instance.create_limit_order(
+                        symbol, side, quantity, price
+                    )
             else:
                 raise Exception(f"不支持的订单类型: {order_type}")
             
@@ -101,26 +220,69 @@ class TradingEngine:
             )
             raise Exception(f"交易执行失败: {str(e)}")
     
-    async def get_positions(self, exchange: str = "binance") -> List[Dict]:
+    async def execute_trades_batch(
+        self, orders: List[Dict], concurrency: int = BATCH_ORDER_CONCURRENCY
+    ) -> List[Dict]:
+        """批量执行交易
+        
+        各订单的风险检查、下单和记录并发进行（同时最多concurrency个），结果按输入顺序返回；
+        单个订单失败时对应位置返回 success=False 及错误信息，不影响其余订单。
+        orders 中每一项为 execute_trade 的关键字参数。
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        results = await asyncio.gather(
+            *[self._execute_trade_limited(semaphore, order) for order in orders],
+            return_exceptions=True
+        )
+        
+        batch_results = []
+        for order, result in zip(orders, results):
+            if isinstance(result, Exception):
+                batch_results.append({
+                    "success": False,
+                    "symbol": order.get("symbol"),
+                    "side": order.get("side"),
+                    "quantity": order.get("quantity"),
+                    "error": str(result)
+                })
+            else:
+                batch_results.append(result)
+        
+        return batch_results
+    
+    async def _execute_trade_limited(self, semaphore: asyncio.Semaphore, order: Dict) -> Dict:
+        """在并发上限内执行单个订单"""
+        async with semaphore:
+            return await self.execute_trade(**order)
+    
+    async def get_positions(
+        self, exchange: str = "binance", exchange_instance: Optional[ccxt.Exchange] = None
+    ) -> List[Dict]:
         """获取持仓信息"""
-        exchange_instance = self.active_exchanges.get(exchange)
-        if not exchange_instance:
-            raise Exception(f"交易所 {exchange} 未配置")
+        if exchange_instance is None:
+            exchange_instance = self.get_exchange(exchange)
+        else:
+            exchange = exchange_instance.id
         
         try:
             # 获取持仓
+            await self._throttle(exchange, "positions").acquire()
             positions = await exchange_instance.fetch_positions()
             return positions
         except Exception as e:
             raise Exception(f"获取持仓失败: {str(e)}")
     
-    async def get_account_balance(self, exchange: str = "binance") -> Dict:
+    async def get_account_balance(
+        self, exchange: str = "binance", exchange_instance: Optional[ccxt.Exchange] = None
+    ) -> Dict:
         """获取账户余额"""
-        exchange_instance = self.active_exchanges.get(exchange)
-        if not exchange_instance:
-            raise Exception(f"交易所 {exchange} 未配置")
+        if exchange_instance is None:
+            exchange_instance = self.get_exchange(exchange)
+        else:
+            exchange = exchange_instance.id
         
         try:
+            await self._throttle(exchange, "balance").acquire()
             balance = await exchange_instance.fetch_balance()
             return {
                 "total": balance['total'],
@@ -130,16 +292,175 @@ class TradingEngine:
         except Exception as e:
             raise Exception(f"获取余额失败: {str(e)}")
     
+    async def get_all_positions(self) -> Dict[str, List[Dict]]:
+        """并发获取所有已启用交易所的持仓，单个交易所失败不影响其余结果"""
+        names = list(self.active_exchanges)
+        results = await asyncio.gather(
+            *[self._fetch_positions(name) for name in names],
+            return_exceptions=True
+        )
+        
+        positions = {}
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.error(f"获取 {name} 持仓失败: {result}")
+                continue
+            positions[name] = result
+        
+        return positions
+    
+    async def get_all_balances(self) -> Dict[str, Dict]:
+        """并发获取所有已启用交易所的余额，单个交易所失败不影响其余结果"""
+        names = list(self.active_exchanges)
+        results = await asyncio.gather(
+            *[self._fetch_balance(name) for name in names],
+            return_exceptions=True
+        )
+        
+        balances = {}
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.error(f"获取 {name} 余额失败: {result}")
+                continue
+            balances[name] = {
+                "total": result['total'],
+                "free": result['free'],
+                "used": result['used']
+            }
+        
+        return balances
+    
+    async def _fetch_positions(self, exchange: str) -> List[Dict]:
+        """限流后获取单个交易所持仓"""
+        await self._throttle(exchange, "positions").acquire()
+        return await self.active_exchanges[exchange].fetch_positions()
+    
+    async def _fetch_balance(self, exchange: str) -> Dict:
+        """限流后获取单个交易所余额"""
+        await self._throttle(exchange, "balance").acquire()
+        return await self.active_exchanges[exchange].fetch_balance()
+    
+    def _native_symbol(self, exchange: str, symbol: str) -> str:
+        """ccxt统一交易对（如BTC/USDT）转换为交易所原生代码（如BTCUSDT），与Symbol表的格式一致"""
+        exchange_instance = self.active_exchanges.get(exchange)
+        markets = getattr(exchange_instance, 'markets', None) or {}
+        market = markets.get(symbol)
+        return market['id'] if market else symbol
+    
     async def _record_trade(self, order: Dict, account_id: int, exchange: str):
-        """记录交易到数据库"""
-        # 这里应该将交易记录保存到数据库
-        pass
+        """记录交易（放入写入队列，由后台任务批量写入数据库）"""
+        fee = order.get('fee') or {}
+        await self._trade_wal.put({
+            "exchange": exchange,
+            "symbol": self._native_symbol(exchange, order.get('symbol')),
+            "account_id": account_id,
+            "exchange_order_id": str(order['id']),
+            "client_order_id": order.get('clientOrderId') or "",
+            "side": order.get('side'),
+            "order_type": order.get('type'),
+            "quantity": order.get('amount') or 0.0,
+            "price": order.get('price') or 0.0,
+            "executed_quantity": order.get('filled') or 0.0,
+            "executed_price": order.get('average') or order.get('price') or 0.0,
+            "fee": fee.get('cost') or 0.0,
+            "fee_asset": fee.get('currency') or "",
+            "status": order.get('status') or "pending"
+        })
     
     async def _record_failed_trade(
         self, symbol: str, side: str, quantity: float, 
         order_type: str, price: Optional[float], 
         error: str, account_id: int, exchange: str
     ):
-        """记录失败交易"""
-        # 记录失败交易到数据库
-        pass
\ No newline at end of file
+        """记录失败交易（放入写入队列，由后台任务批量写入数据库）"""
+        logger.warning(f"交易失败 {exchange} {symbol} {side} {quantity}: {error}")
+        await self._trade_wal.put({
+            "exchange": exchange,
+            "symbol": self._native_symbol(exchange, symbol),
+            "account_id": account_id,
+            "exchange_order_id": "",
+            "client_order_id": "",
+            "side": side,
+            "order_type": order_type,
+            "quantity": quantity,
+            "price": price or 0.0,
+            "executed_quantity": 0.0,
+            "executed_price": 0.0,
+            "fee": 0.0,
+            "fee_asset": "",
+            "status": "failed"
+        })
+    
+    async def _trade_writer(self):
+        """后台批量写入交易记录：每批最多TRADE_FLUSH_BATCH_SIZE条或等待TRADE_FLUSH_INTERVAL秒
+        
+        取到停止标记时写完当前批次后退出。
+        """
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            row = await self._trade_wal.get()
+            if row is _TRADE_WAL_STOP:
+                return
+            rows = [row]
+            deadline = loop.time() + TRADE_FLUSH_INTERVAL
+            
+            while len(rows) < TRADE_FLUSH_BATCH_SIZE:
+                if not self._trade_wal.empty():
+                    row = self._trade_wal.get_nowait()
+                else:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        row = await asyncio.wait_for(self._trade_wal.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if row is _TRADE_WAL_STOP:
+                    stopping = True
+                    break
+                rows.append(row)
+            
+            try:
+                # 同步数据库会话放到线程池执行，避免阻塞事件循环
+                await loop.run_in_executor(None, self._flush_trades, rows)
+            except Exception as e:
+                logger.error(f"批量写入交易记录失败（{len(rows)}条）: {e}")
+    
+    def _flush_trades(self, rows: List[Dict]):
+        """在一个事务内批量插入交易记录"""
+        session = db_manager.get_session()
+        try:
+            # 一次查询解析本批涉及的所有交易对ID
+            pairs = {(row["exchange"], row["symbol"]) for row in rows}
+            symbol_ids = {
+                (exchange_name, symbol): symbol_id
+                for symbol_id, symbol, exchange_name in session.query(
+                    Symbol.id, Symbol.symbol, Exchange.name
+                ).join(Exchange, Symbol.exchange_id == Exchange.id).filter(
+                    Symbol.symbol.in_({symbol for _, symbol in pairs}),
+                    Exchange.name.in_({exchange_name for exchange_name, _ in pairs})
+                )
+            }
+            
+            records = []
+            for row in rows:
+                symbol_id = symbol_ids.get((row["exchange"], row["symbol"]))
+                if symbol_id is None:
+                    logger.warning(f"交易对 {row['exchange']}:{row['symbol']} 不在Symbol表中，交易记录已跳过: {row}")
+                    continue
+                if row["account_id"] is None:
+                    logger.warning(f"交易记录缺少账户信息，已跳过: {row}")
+                    continue
+                record = {k: v for k, v in row.items() if k not in ("exchange", "symbol")}
+                record["symbol_id"] = symbol_id
+                records.append(record)
+            
+            if records:
+                session.execute(insert(Trade), records)
+                session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
\ No newline at end of file
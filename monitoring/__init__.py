@@ -1,7 +1,8 @@
 """监控系统模块"""
 
-from .prometheus_client import PrometheusClient
+from .prometheus_client import PrometheusClient, TickSample
 from .system_monitor import SystemMonitor
 from .trading_monitor import TradingMonitor
+from .scheduler import PeriodicScheduler
 
-__all__ = ["PrometheusClient", "SystemMonitor", "TradingMonitor"]
\ No newline at end of file
+__all__ = ["PrometheusClient", "TickSample", "SystemMonitor", "TradingMonitor", "PeriodicScheduler"]
\ No newline at end of file
@@ -2,22 +2,51 @@
 Prometheus监控客户端
 """
 import time
+import math
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, NamedTuple, Optional, Tuple
 from prometheus_client import Counter, Gauge, Histogram, start_http_server
 
 logger = logging.getLogger(__name__)
 
+# 未配置关注列表时，按出现顺序最多单独统计的交易对数量
+MAX_TRACKED_SYMBOLS = 50
+OTHER_SYMBOL = "other"
+
+# 直方图分桶（秒）：交易场景关注微秒到百毫秒级延迟，默认分桶面向Web请求过于粗糙
+REQUEST_DURATION_BUCKETS = (1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 1e-1, 5e-1, 1.0)
+DATA_LATENCY_BUCKETS = (1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2)
+
+
+class TickSample(NamedTuple):
+    """行情采样，缺失的字段为NaN"""
+    price: float
+    volume: float = math.nan
+    pnl: float = math.nan
+    
+    @classmethod
+    def from_dict(cls, trade_data: Dict[str, Any]) -> "TickSample":
+        """从字典格式的行情数据构建"""
+        return cls(
+            trade_data.get('price', 0),
+            trade_data.get('volume', math.nan),
+            trade_data.get('pnl', math.nan)
+        )
+
 
 class PrometheusClient:
     """Prometheus监控客户端"""
     
-    def __init__(self, port: int = 8000):
+    def __init__(self, port: int = 8000, tracked_symbols: Optional[Iterable[str]] = None):
         self.port = port
         
-        # 交易指标
-        self.trades_total = Counter('trading_trades_total', 'Total number of trades', ['exchange', 'symbol', 'type'])
-        self.trading_volume = Counter('trading_volume_total', 'Total trading volume', ['exchange', 'symbol'])
+        # 按交易对区分的指标只保留关注的交易对，其余归入other，避免标签基数无限增长
+        self._tracked_symbols = set(tracked_symbols) if tracked_symbols is not None else set()
+        self._auto_track_symbols = tracked_symbols is None
+        
+        # 交易指标（计数器不带symbol标签）
+        self.trades_total = Counter('trading_trades_total', 'Total number of trades', ['exchange', 'type'])
+        self.trading_volume = Counter('trading_volume_total', 'Total trading volume', ['exchange'])
         self.current_price = Gauge('trading_current_price', 'Current price', ['exchange', 'symbol'])
         self.profit_loss = Gauge('trading_profit_loss', 'Profit/Loss', ['exchange', 'symbol'])
         
@@ -32,10 +61,21 @@ class PrometheusClient:
         self.sharpe_ratio = Gauge('risk_sharpe_ratio', 'Sharpe ratio', ['exchange', 'account_type'])
         
         # 性能指标
-        self.request_duration = Histogram('api_request_duration_seconds', 'API request duration')
-        self.data_latency = Histogram('data_latency_seconds', 'Data processing latency')
+        self.request_duration = Histogram('api_request_duration_seconds', 'API request duration',
+                                          buckets=REQUEST_DURATION_BUCKETS)
+        self.data_latency = Histogram('data_latency_seconds', 'Data processing latency',
+                                      buckets=DATA_LATENCY_BUCKETS)
         
         self.start_time = time.time()
+        
+        # (指标, 标签值) -> 子指标
+        self._children: Dict[tuple, Any] = {}
+        # (交易所, 交易对) -> (价格子指标, 成交量子指标, 交易对标签)，行情热路径直接使用
+        self._tick_bindings: Dict[Tuple[str, str], tuple] = {}
+        
+        # 摘要用的影子计数，避免读取prometheus_client内部属性
+        self._trade_counts: Dict[Tuple[str, str], int] = {}
+        self._volume_totals: Dict[str, float] = {}
     
     def start_server(self):
         """启动Prometheus HTTP服务器"""
@@ -45,25 +85,69 @@ class PrometheusClient:
         except Exception as e:
             logger.error(f"启动Prometheus服务器失败: {e}")
     
-    def update_trading_metrics(self, exchange: str, symbol: str, trade_data: Dict[str, Any]):
-        """更新交易指标"""
+    def _child(self, metric, *label_values: str):
+        """获取带标签的子指标（缓存，避免每次更新都重新解析标签）"""
+        key = (metric, label_values)
+        child = self._children.get(key)
+        if child is None:
+            child = metric.labels(*label_values)
+            self._children[key] = child
+        return child
+    
+    def _symbol_label(self, symbol: str) -> str:
+        """获取交易对标签值，未关注的交易对归入other"""
+        if symbol in self._tracked_symbols:
+            return symbol
+        
+        if self._auto_track_symbols and len(self._tracked_symbols) < MAX_TRACKED_SYMBOLS:
+            self._tracked_symbols.add(symbol)
+            return symbol
+        
+        return OTHER_SYMBOL
+    
+    def _bind_tick(self, exchange: str, symbol: str) -> tuple:
+        """交易对首次出现时绑定其行情子指标"""
+        symbol_label = self._symbol_label(symbol)
+        bound = (
+            self._child(self.current_price, exchange, symbol_label),
+            self._child(self.trading_volume, exchange),
+            symbol_label
+        )
+        self._tick_bindings[(exchange, symbol)] = bound
+        return bound
+    
+    def update_tick(self, exchange: str, symbol: str, sample: TickSample):
+        """更新行情指标（热路径）"""
         try:
-            self.current_price.labels(exchange=exchange, symbol=symbol).set(trade_data.get('price', 0))
+            bound = self._tick_bindings.get((exchange, symbol)) or self._bind_tick(exchange, symbol)
+            price_gauge, volume_counter, symbol_label = bound
             
-            if 'volume' in trade_data:
-                self.trading_volume.labels(exchange=exchange, symbol=symbol).inc(trade_data['volume'])
+            price_gauge.set(sample.price)
             
-            if 'pnl' in trade_data:
-                self.profit_loss.labels(exchange=exchange, symbol=symbol).set(trade_data['pnl'])
+            if not math.isnan(sample.volume):
+                volume_counter.inc(sample.volume)
+                self._volume_totals[exchange] = self._volume_totals.get(exchange, 0.0) + sample.volume
+            
+            if not math.isnan(sample.pnl):
+                # 盈亏子指标按需创建，未上报盈亏的交易对不导出该序列
+                self._child(self.profit_loss, exchange, symbol_label).set(sample.pnl)
                 
         except Exception as e:
             logger.error(f"更新交易指标失败: {e}")
     
+    def update_trading_metrics(self, exchange: str, symbol: str, trade_data: Dict[str, Any]):
+        """更新交易指标（字典格式）"""
+        self.update_tick(exchange, symbol, TickSample.from_dict(trade_data))
+    
     def record_trade(self, exchange: str, symbol: str, trade_type: str, quantity: float):
         """记录交易"""
         try:
-            self.trades_total.labels(exchange=exchange, symbol=symbol, type=trade_type).inc()
-            self.trading_volume.labels(exchange=exchange, symbol=symbol).inc(quantity)
+            self._child(self.trades_total, exchange, trade_type).inc()
+            self._child(self.trading_volume, exchange).inc(quantity)
+            
+            key = (exchange, trade_type)
+            self._trade_counts[key] = self._trade_counts.get(key, 0) + 1
+            self._volume_totals[exchange] = self._volume_totals.get(exchange, 0.0) + quantity
         except Exception as e:
             logger.error(f"记录交易失败: {e}")
     
@@ -71,13 +155,13 @@ class PrometheusClient:
         """更新风险指标"""
         try:
             if 'var' in risk_data:
-                self.risk_value.labels(exchange=exchange, account_type=account_type).set(risk_data['var'])
+                self._child(self.risk_value, exchange, account_type).set(risk_data['var'])
             
             if 'max_drawdown' in risk_data:
-                self.max_drawdown.labels(exchange=exchange, account_type=account_type).set(risk_data['max_drawdown'])
+                self._child(self.max_drawdown, exchange, account_type).set(risk_data['max_drawdown'])
             
             if 'sharpe_ratio' in risk_data:
-                self.sharpe_ratio.labels(exchange=exchange, account_type=account_type).set(risk_data['sharpe_ratio'])
+                self._child(self.sharpe_ratio, exchange, account_type).set(risk_data['sharpe_ratio'])
                 
         except Exception as e:
             logger.error(f"更新风险指标失败: {e}")
@@ -96,6 +180,18 @@ class PrometheusClient:
         except Exception as e:
             logger.error(f"更新系统指标失败: {e}")
     
+    def request_timer(self):
+        """API请求计时上下文管理器（perf_counter计时，退出时直接observe）
+        
+        用法: with client.request_timer(): order = await exchange.create_order(...)
+        每次调用返回新的计时器，嵌套或并发使用互不影响。
+        """
+        return self.request_duration.time()
+    
+    def data_latency_timer(self):
+        """数据处理延迟计时上下文管理器"""
+        return self.data_latency.time()
+    
     def record_request_duration(self, duration: float):
         """记录请求持续时间"""
         try:
@@ -115,11 +211,11 @@ class PrometheusClient:
         return {
             "uptime": time.time() - self.start_time,
             "trades_total": {
-                "value": self.trades_total._value.get(),
-                "labels": list(self.trades_total._metrics.keys())
+                "value": sum(self._trade_counts.values()),
+                "labels": list(self._trade_counts)
             },
             "trading_volume": {
-                "value": self.trading_volume._value.get(),
-                "labels": list(self.trading_volume._metrics.keys())
+                "value": sum(self._volume_totals.values()),
+                "labels": [(exchange,) for exchange in self._volume_totals]
             }
         }
\ No newline at end of file
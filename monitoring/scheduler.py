@@ -0,0 +1,85 @@
+"""
+周期任务调度器
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicScheduler:
+    """周期任务调度器
+
+    所有周期任务共用一个事件循环定时器队列（loop.call_later），
+    按固定节拍（而非上次结束时间）重新调度，多个任务的触发时间保持对齐；
+    上一次执行尚未结束时跳过本次触发，避免任务堆积。
+    """
+
+    def __init__(self):
+        self._jobs: List[dict] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.is_running = False
+
+    def add(self, interval: float, coro_factory: Callable[[], Awaitable]):
+        """注册周期任务，coro_factory每次调用返回一个新的协程"""
+        job = {"interval": interval, "factory": coro_factory, "handle": None, "task": None}
+        self._jobs.append(job)
+        if self.is_running:
+            self._arm(job, self._loop.time())
+
+    def start(self):
+        """在当前事件循环中启动调度"""
+        self._loop = asyncio.get_running_loop()
+        self.is_running = True
+        now = self._loop.time()
+        for job in self._jobs:
+            self._arm(job, now)
+        logger.info(f"周期任务调度器已启动，任务数: {len(self._jobs)}")
+
+    async def stop(self):
+        """停止调度并取消正在执行的任务"""
+        self.is_running = False
+        tasks = []
+        for job in self._jobs:
+            if job["handle"]:
+                job["handle"].cancel()
+                job["handle"] = None
+            if job["task"] and not job["task"].done():
+                job["task"].cancel()
+                tasks.append(job["task"])
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        logger.info("周期任务调度器已停止")
+
+    def _arm(self, job: dict, when: float):
+        """在指定的事件循环时间触发任务"""
+        job["next"] = when
+        job["handle"] = self._loop.call_at(when, self._fire, job)
+
+    def _fire(self, job: dict):
+        """触发任务并预约下一次执行"""
+        if not self.is_running:
+            return
+
+        if job["task"] is None or job["task"].done():
+            job["task"] = self._loop.create_task(self._run_job(job))
+        else:
+            logger.warning(f"周期任务 {job['factory']} 上次执行未结束，跳过本次")
+
+        # 按固定节拍推进；若已落后多个周期则直接对齐到下一个未来节拍
+        next_time = job["next"] + job["interval"]
+        now = self._loop.time()
+        if next_time <= now:
+            missed = int((now - next_time) // job["interval"]) + 1
+            next_time += missed * job["interval"]
+        self._arm(job, next_time)
+
+    async def _run_job(self, job: dict):
+        """执行任务，异常只记录不中断调度"""
+        try:
+            await job["factory"]()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"周期任务 {job['factory']} 执行失败: {e}")
@@ -1,66 +1,90 @@
 """
 系统监控模块
 """
-import psutil
+import asyncio
 import time
+import psutil
 import logging
-from typing import Dict, Any
-from threading import Thread
+from typing import Dict, Any, Optional
 from .prometheus_client import PrometheusClient
 
 logger = logging.getLogger(__name__)
 
+# 系统指标快照缓存时间（秒）
+SNAPSHOT_TTL = 1.0
+# 磁盘使用量变化缓慢，单独缓存（秒）
+DISK_USAGE_TTL = 60.0
+
 
 class SystemMonitor:
     """系统监控器"""
     
+    interval = 10  # 采集间隔（秒）
+    
     def __init__(self, prometheus_client: PrometheusClient):
         self.prometheus_client = prometheus_client
         self.is_running = False
-        self.monitor_thread = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_snapshot: Dict[str, Any] = {}
+        self._last_snapshot_time = 0.0
+        self._disk_cache = None
+        self._disk_cache_time = 0.0
+        
+        # 预热CPU采样，之后interval=None返回与上次调用之间的使用率
+        psutil.cpu_percent(interval=None)
     
     def start(self):
-        """启动系统监控"""
+        """启动系统监控：在当前运行的事件循环中创建监控任务（需在事件循环内调用）"""
         self.is_running = True
-        self.monitor_thread = Thread(target=self._monitoring_loop, daemon=True)
-        self.monitor_thread.start()
+        self._task = asyncio.get_running_loop().create_task(self.run())
         logger.info("系统监控已启动")
     
     def stop(self):
-        """停止系统监控"""
+        """停止系统监控（取消监控任务）"""
         self.is_running = False
-        if self.monitor_thread:
-            self.monitor_thread.join(timeout=5)
+        if self._task:
+            self._task.cancel()
+            self._task = None
         logger.info("系统监控已停止")
     
-    def _monitoring_loop(self):
-        """监控循环"""
+    async def run(self):
+        """监控循环（未使用PeriodicScheduler时独立运行）"""
         while self.is_running:
             try:
-                system_data = self._collect_system_metrics()
-                self.prometheus_client.update_system_metrics(system_data)
-                time.sleep(10)  # 每10秒更新一次
+                await self.collect()
+                await asyncio.sleep(self.interval)
                 
             except Exception as e:
                 logger.error(f"系统监控错误: {e}")
-                time.sleep(30)  # 错误后等待30秒
+                await asyncio.sleep(30)  # 错误后等待30秒
+    
+    async def collect(self):
+        """采集一次系统指标并更新Prometheus，可注册到PeriodicScheduler"""
+        # psutil采样会阻塞，放到线程池执行
+        loop = asyncio.get_running_loop()
+        system_data = await loop.run_in_executor(None, self._collect_system_metrics)
+        self.prometheus_client.update_system_metrics(system_data)
     
     def _collect_system_metrics(self) -> Dict[str, Any]:
-        """收集系统指标"""
+        """收集系统指标（SNAPSHOT_TTL内复用上次快照）"""
+        now = time.monotonic()
+        if self._last_snapshot and now - self._last_snapshot_time < SNAPSHOT_TTL:
+            return self._last_snapshot
+        
         try:
-            # CPU使用率
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # CPU使用率（非阻塞）
+            cpu_percent = psutil.cpu_percent(interval=None)
             
             # 内存使用
             memory = psutil.virtual_memory()
             
             # 磁盘使用
-            disk = psutil.disk_usage('/')
+            disk = self._disk_usage(now)
             
             # 网络IO
             net_io = psutil.net_io_counters()
             
-            return {
+            self._last_snapshot = {
                 "cpu_usage": cpu_percent,
                 "memory_usage": memory.used,
                 "memory_total": memory.total,
@@ -69,14 +93,22 @@ class SystemMonitor:
                 "disk_total": disk.total,
                 "disk_percent": disk.percent,
                 "network_bytes_sent": net_io.bytes_sent,
-                "network_bytes_recv": net_io.bytes_recv,
-                "process_count": len(psutil.pids())
+                "network_bytes_recv": net_io.bytes_recv
             }
+            self._last_snapshot_time = now
+            return self._last_snapshot
             
         except Exception as e:
             logger.error(f"收集系统指标失败: {e}")
             return {}
     
+    def _disk_usage(self, now: float):
+        """获取磁盘使用情况（DISK_USAGE_TTL内复用）"""
+        if self._disk_cache is None or now - self._disk_cache_time >= DISK_USAGE_TTL:
+            self._disk_cache = psutil.disk_usage('/')
+            self._disk_cache_time = now
+        return self._disk_cache
+    
     def check_system_health(self) -> Dict[str, bool]:
         """检查系统健康状态"""
         try:
@@ -87,23 +119,27 @@ class SystemMonitor:
                 "network": True
             }
             
+            system_data = self._collect_system_metrics()
+            if not system_data:
+                raise RuntimeError("系统指标不可用")
+            
             # 检查CPU
-            cpu_percent = psutil.cpu_percent(interval=1)
+            cpu_percent = system_data['cpu_usage']
             if cpu_percent > 90:
                 health_status["cpu"] = False
                 logger.warning(f"CPU使用率过高: {cpu_percent}%")
             
             # 检查内存
-            memory = psutil.virtual_memory()
-            if memory.percent > 90:
+            memory_percent = system_data['memory_percent']
+            if memory_percent > 90:
                 health_status["memory"] = False
-                logger.warning(f"内存使用率过高: {memory.percent}%")
+                logger.warning(f"内存使用率过高: {memory_percent}%")
             
             # 检查磁盘
-            disk = psutil.disk_usage('/')
-            if disk.percent > 90:
+            disk_percent = system_data['disk_percent']
+            if disk_percent > 90:
                 health_status["disk"] = False
-                logger.warning(f"磁盘使用率过高: {disk.percent}%")
+                logger.warning(f"磁盘使用率过高: {disk_percent}%")
             
             return health_status
             
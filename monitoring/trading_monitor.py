@@ -1,59 +1,76 @@
 """
 交易监控模块
 """
+import asyncio
 import time
 import logging
-from typing import Dict, Any, List
-from threading import Thread
+from collections import OrderedDict, deque
+from types import MappingProxyType
+from typing import Dict, Any, Optional, Tuple
 from .prometheus_client import PrometheusClient
 
 logger = logging.getLogger(__name__)
 
+# 交易数据和告警的数量上限，超出时淘汰最旧的条目
+MAX_TRADING_ENTRIES = 5000
+MAX_RISK_ALERTS = 10000
+
 
 class TradingMonitor:
     """交易监控器"""
     
+    interval = 5  # 检查间隔（秒）
+    
     def __init__(self, prometheus_client: PrometheusClient):
         self.prometheus_client = prometheus_client
         self.is_running = False
-        self.monitor_thread = None
-        self.trading_data = {}
-        self.risk_alerts = []
+        self._task: Optional[asyncio.Task] = None
+        # (交易所, 交易对) -> 最新数据，按最后更新时间排序，过期数据总在头部
+        self.trading_data: OrderedDict = OrderedDict()
+        # 按告警时间排序，过期告警总在头部
+        self.risk_alerts: deque = deque()
+        self._alert_keys = set()  # (level, message)，用于O(1)告警去重
+        self._alerts_version = 0
+        self._alerts_snapshot: Tuple[Dict[str, Any], ...] = ()
+        self._alerts_snapshot_version = 0
     
     def start(self):
-        """启动交易监控"""
+        """启动交易监控：在当前运行的事件循环中创建监控任务（需在事件循环内调用）"""
         self.is_running = True
-        self.monitor_thread = Thread(target=self._monitoring_loop, daemon=True)
-        self.monitor_thread.start()
+        self._task = asyncio.get_running_loop().create_task(self.run())
         logger.info("交易监控已启动")
     
     def stop(self):
-        """停止交易监控"""
+        """停止交易监控（取消监控任务）"""
         self.is_running = False
-        if self.monitor_thread:
-            self.monitor_thread.join(timeout=5)
+        if self._task:
+            self._task.cancel()
+            self._task = None
         logger.info("交易监控已停止")
     
-    def _monitoring_loop(self):
-        """监控循环"""
+    async def run(self):
+        """监控循环（未使用PeriodicScheduler时独立运行）"""
         while self.is_running:
             try:
-                # 更新交易数据
-                self._update_trading_metrics()
-                
-                # 检查风险指标
-                self._check_risk_alerts()
-                
-                time.sleep(5)  # 每5秒更新一次
+                await self.tick()
+                await asyncio.sleep(self.interval)
                 
             except Exception as e:
                 logger.error(f"交易监控错误: {e}")
-                time.sleep(10)  # 错误后等待10秒
+                await asyncio.sleep(10)  # 错误后等待10秒
+    
+    async def tick(self):
+        """执行一次交易数据清理和风险检查，可注册到PeriodicScheduler"""
+        # 更新交易数据
+        self._update_trading_metrics()
+        
+        # 检查风险指标
+        self._check_risk_alerts()
     
     def update_trading_data(self, exchange: str, symbol: str, trade_data: Dict[str, Any]):
         """更新交易数据"""
         try:
-            key = f"{exchange}:{symbol}"
+            key = (exchange, symbol)
             self.trading_data[key] = {
                 "exchange": exchange,
                 "symbol": symbol,
@@ -62,6 +79,9 @@ class TradingMonitor:
                 "timestamp": time.time(),
                 "last_update": trade_data
             }
+            self.trading_data.move_to_end(key)
+            if len(self.trading_data) > MAX_TRADING_ENTRIES:
+                self.trading_data.popitem(last=False)
             
             # 更新Prometheus指标
             self.prometheus_client.update_trading_metrics(exchange, symbol, trade_data)
@@ -74,19 +94,20 @@ class TradingMonitor:
         try:
             self.prometheus_client.record_trade(exchange, symbol, trade_type, quantity)
             
-            # 记录交易详情
-            trade_record = {
-                "exchange": exchange,
-                "symbol": symbol,
-                "type": trade_type,
-                "quantity": quantity,
-                "price": price,
-                "timestamp": time.time(),
-                "total_value": quantity * price
-            }
-            
-            # 这里可以保存到数据库或日志文件
-            logger.info(f"交易记录: {trade_record}")
+            # 交易详情仅用于日志，日志级别未开启INFO时不构建
+            if logger.isEnabledFor(logging.INFO):
+                trade_record = {
+                    "exchange": exchange,
+                    "symbol": symbol,
+                    "type": trade_type,
+                    "quantity": quantity,
+                    "price": price,
+                    "timestamp": time.time(),
+                    "total_value": quantity * price
+                }
+                
+                # 这里可以保存到数据库或日志文件
+                logger.info("交易记录: %s", trade_record)
             
         except Exception as e:
             logger.error(f"记录交易失败: {e}")
@@ -94,16 +115,14 @@ class TradingMonitor:
     def _update_trading_metrics(self):
         """更新交易指标"""
         try:
-            # 清理过期数据（超过10分钟）
+            # 清理过期数据（超过10分钟），只需从头部弹出已过期的条目
             current_time = time.time()
-            expired_keys = []
-            
-            for key, data in self.trading_data.items():
-                if current_time - data['timestamp'] > 600:  # 10分钟
-                    expired_keys.append(key)
             
-            for key in expired_keys:
-                del self.trading_data[key]
+            while self.trading_data:
+                data = next(iter(self.trading_data.values()))
+                if current_time - data['timestamp'] <= 600:  # 10分钟
+                    break
+                self.trading_data.popitem(last=False)
                 
         except Exception as e:
             logger.error(f"更新交易指标失败: {e}")
@@ -113,25 +132,28 @@ class TradingMonitor:
         try:
             current_time = time.time()
             
-            # 检查数据更新延迟
-            for key, data in self.trading_data.items():
+            # 检查数据更新延迟（按更新时间排序，遇到未延迟的条目即可停止）
+            for (exchange, symbol), data in self.trading_data.items():
                 delay = current_time - data['timestamp']
-                if delay > 60:  # 超过60秒没有更新
-                    alert = {
-                        "level": "warning",
-                        "message": f"{key} 数据更新延迟: {delay:.1f}秒",
-                        "timestamp": current_time
-                    }
-                    
-                    if alert not in self.risk_alerts:
-                        self.risk_alerts.append(alert)
-                        logger.warning(alert["message"])
+                if delay <= 60:  # 超过60秒没有更新才告警
+                    break
+                alert = {
+                    "level": "warning",
+                    "message": f"{exchange}:{symbol} 数据更新延迟: {delay:.1f}秒",
+                    "timestamp": current_time
+                }
+                
+                if self._add_alert(alert):
+                    logger.warning(alert["message"])
             
-            # 清理过期告警（超过1小时）
-            self.risk_alerts = [
-                alert for alert in self.risk_alerts 
-                if current_time - alert['timestamp'] < 3600
-            ]
+            # 清理过期告警（超过1小时），只需从头部弹出
+            expired = False
+            while self.risk_alerts and current_time - self.risk_alerts[0]['timestamp'] >= 3600:
+                alert = self.risk_alerts.popleft()
+                self._alert_keys.discard(self._alert_key(alert))
+                expired = True
+            if expired:
+                self._alerts_version += 1
                 
         except Exception as e:
             logger.error(f"检查风险告警失败: {e}")
@@ -146,16 +168,37 @@ class TradingMonitor:
                 "active_symbols": active_symbols,
                 "total_volume": total_volume,
                 "last_update": time.time(),
-                "trading_data": self.trading_data
+                "trading_data": MappingProxyType(self.trading_data)
             }
             
         except Exception as e:
             logger.error(f"获取交易摘要失败: {e}")
             return {}
     
-    def get_risk_alerts(self) -> List[Dict[str, Any]]:
-        """获取风险告警"""
-        return self.risk_alerts.copy()
+    @staticmethod
+    def _alert_key(alert: Dict[str, Any]) -> tuple:
+        """告警去重键"""
+        return (alert["level"], alert["message"])
+    
+    def _add_alert(self, alert: Dict[str, Any]) -> bool:
+        """添加告警，已存在相同告警时返回False"""
+        key = self._alert_key(alert)
+        if key in self._alert_keys:
+            return False
+        if len(self.risk_alerts) >= MAX_RISK_ALERTS:
+            oldest = self.risk_alerts.popleft()
+            self._alert_keys.discard(self._alert_key(oldest))
+        self._alert_keys.add(key)
+        self.risk_alerts.append(alert)
+        self._alerts_version += 1
+        return True
+    
+    def get_risk_alerts(self) -> Tuple[Dict[str, Any], ...]:
+        """获取风险告警（只读快照，告警无变化时复用）"""
+        if self._alerts_snapshot_version != self._alerts_version:
+            self._alerts_snapshot = tuple(self.risk_alerts)
+            self._alerts_snapshot_version = self._alerts_version
+        return self._alerts_snapshot
     
     def update_risk_metrics(self, exchange: str, account_type: str, risk_data: Dict[str, Any]):
         """更新风险指标"""
@@ -170,8 +213,7 @@ class TradingMonitor:
                     "timestamp": time.time()
                 }
                 
-                if alert not in self.risk_alerts:
-                    self.risk_alerts.append(alert)
+                if self._add_alert(alert):
                     logger.warning(alert["message"])
                     
         except Exception as e:
@@ -179,7 +221,9 @@ class TradingMonitor:
     
     def clear_alert(self, alert_message: str):
         """清除特定告警"""
-        self.risk_alerts = [
+        self.risk_alerts = deque(
             alert for alert in self.risk_alerts 
             if alert["message"] != alert_message
-        ]
\ No newline at end of file
+        )
+        self._alert_keys = {self._alert_key(alert) for alert in self.risk_alerts}
+        self._alerts_version += 1
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""
+风险指标计算内核
+
+组合收益率、VaR、波动率、夏普/索提诺比率在一个函数内完成；
+另有风险报告使用的风险评分和持仓集中度计算。
+安装了numba时JIT编译为机器码，否则退回等价的numpy实现。
+"""
+import math
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _quantiles(values, probabilities):
+    """按线性插值计算分位数（与np.percentile默认方法一致）
+
+    所有分位点需要的次序统计量通过一次np.partition选出，O(N)，无需完整排序。
+    """
+    n = len(values)
+    positions = probabilities * (n - 1)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, n - 1)
+    partitioned = np.partition(values, np.concatenate((lower, upper)))
+
+    result = np.empty(len(probabilities))
+    for i in range(len(probabilities)):
+        lo = partitioned[lower[i]]
+        result[i] = lo + (positions[i] - lower[i]) * (partitioned[upper[i]] - lo)
+    return result
+
+
+def _var_kernel_numpy(prices: np.ndarray, weights: np.ndarray, confidences: np.ndarray,
+                      ann: float = 252.0, rf: float = 0.02):
+    """numpy实现，返回 (各置信度VaR, 年化波动率, 夏普比率, 索提诺比率)"""
+    # 收益率矩阵在一个缓冲区内原地计算，组合收益率为一次矩阵-向量乘法
+    previous = prices[:, :-1]
+    returns = np.subtract(prices[:, 1:], previous)
+    np.divide(returns, previous, out=returns)
+    portfolio_returns = np.matmul(weights, returns)
+
+    var_values = -_quantiles(portfolio_returns, 1.0 - confidences)
+
+    volatility = np.std(portfolio_returns) * math.sqrt(ann)
+    mean_return = np.mean(portfolio_returns) * ann
+    sharpe_ratio = (mean_return - rf) / volatility if volatility > 0 else 0.0
+
+    # 下行收益的个数、和、平方和：非负收益截断为0后不影响求和，无需布尔索引压缩数组
+    downside = np.minimum(portfolio_returns, 0.0)
+    down_n = np.count_nonzero(downside)
+    if down_n > 0:
+        down_mean = downside.sum() / down_n
+        down_var = max(downside @ downside / down_n - down_mean * down_mean, 0.0)
+        downside_volatility = math.sqrt(down_var) * math.sqrt(ann)
+    else:
+        downside_volatility = 0.0
+    sortino_ratio = (mean_return - rf) / downside_volatility if downside_volatility > 0 else 0.0
+
+    return var_values, volatility, sharpe_ratio, sortino_ratio
+
+
+def _var_kernel_loops(prices, weights, confidences, ann=252.0, rf=0.02):
+    """循环实现（供numba编译），返回值与 _var_kernel_numpy 相同"""
+    n_assets, n_points = prices.shape
+    n = n_points - 1
+
+    # 组合收益率：按行（交易对）连续访问
+    portfolio_returns = np.zeros(n)
+    for k in range(n_assets):
+        w = weights[k]
+        for t in range(n):
+            p0 = prices[k, t]
+            portfolio_returns[t] += w * (prices[k, t + 1] - p0) / p0
+
+    var_values = -_quantiles(portfolio_returns, 1.0 - confidences)
+
+    # 单次遍历（Welford）同时计算全部收益和下行收益的均值与方差
+    mean = 0.0
+    m2 = 0.0
+    down_n = 0
+    down_mean = 0.0
+    down_m2 = 0.0
+    for t in range(n):
+        x = portfolio_returns[t]
+        d = x - mean
+        mean += d / (t + 1)
+        m2 += d * (x - mean)
+        if x < 0:
+            down_n += 1
+            dd = x - down_mean
+            down_mean += dd / down_n
+            down_m2 += dd * (x - down_mean)
+
+    volatility = math.sqrt(m2 / n) * math.sqrt(ann)
+    mean_return = mean * ann
+    sharpe_ratio = (mean_return - rf) / volatility if volatility > 0 else 0.0
+
+    downside_volatility = math.sqrt(down_m2 / down_n) * math.sqrt(ann) if down_n > 0 else 0.0
+    sortino_ratio = (mean_return - rf) / downside_volatility if downside_volatility > 0 else 0.0
+
+    return var_values, volatility, sharpe_ratio, sortino_ratio
+
+
+def _risk_score_numpy(var_95, max_drawdown, sharpe_ratio, volatility, thresholds):
+    """numpy实现：各项指标超过的阈值个数之和（夏普比率取负后比较）"""
+    values = np.array([var_95, max_drawdown, -sharpe_ratio, volatility])
+    return int(np.count_nonzero(values[:, None] > thresholds))
+
+
+def _risk_score_loops(var_95, max_drawdown, sharpe_ratio, volatility, thresholds):
+    """循环实现（供numba编译），返回值与 _risk_score_numpy 相同"""
+    values = (float(var_95), float(max_drawdown), -float(sharpe_ratio), float(volatility))
+    score = 0
+    for i in range(4):
+        for j in range(thresholds.shape[1]):
+            if values[i] > thresholds[i, j]:
+                score += 1
+    return score
+
+
+def _concentration_numpy(values: np.ndarray):
+    """numpy实现，返回 (总价值, HHI指数, 最大权重)；总价值不为正时后两项为0"""
+    total = values.sum()
+    if total <= 0:
+        return total, 0.0, 0.0
+    weights = values / total
+    return total, weights @ weights, weights.max()
+
+
+def _concentration_loops(values):
+    """循环实现（供numba编译），返回值与 _concentration_numpy 相同"""
+    total = 0.0
+    for k in range(len(values)):
+        total += values[k]
+    if total <= 0:
+        return total, 0.0, 0.0
+
+    hhi = 0.0
+    max_weight = -np.inf
+    for k in range(len(values)):
+        w = values[k] / total
+        hhi += w * w
+        if w > max_weight:
+            max_weight = w
+    return total, hhi, max_weight
+
+
+if njit is not None:
+    _quantiles = njit(cache=True)(_quantiles)
+    var_kernel = njit(cache=True, fastmath=True)(_var_kernel_loops)
+    # 阈值比较需要保留NaN语义，不使用fastmath
+    risk_score = njit(cache=True)(_risk_score_loops)
+    concentration = njit(cache=True)(_concentration_loops)
+else:
+    var_kernel = _var_kernel_numpy
+    risk_score = _risk_score_numpy
+    concentration = _concentration_numpy
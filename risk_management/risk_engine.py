@@ -3,18 +3,46 @@
 """
 
 import asyncio
+import math
+import sys
 import time
+from collections import Counter
+from statistics import NormalDist
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
 import numpy as np
-import pandas as pd
+
+from risk_management._risk_kernels import var_kernel
 
 logger = logging.getLogger(__name__)
 
+# 每个交易对保留的历史数据点数
+HISTORY_SIZE = 1000
+# 计算最大回撤使用的数据点数
+DRAWDOWN_WINDOW = 100
+# 保留的警报数量
+ALERT_HISTORY_SIZE = 1000
+# 每小时的纳秒数
+NS_PER_HOUR = 3600 * 10**9
+# 正态分布95%/99%分位数（参数法VaR）
+Z_95 = NormalDist().inv_cdf(0.95)
+Z_99 = NormalDist().inv_cdf(0.99)
 
-@dataclass
+# 警报严重程度对应的日志级别
+SEVERITY_LOG_LEVELS = {
+    'low': logging.INFO,
+    'medium': logging.WARNING,
+    'high': logging.ERROR,
+    'critical': logging.CRITICAL
+}
+
+# Python 3.10+ 的dataclass支持slots，报告和回调中的指标、警报对象不再各带一个__dict__
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class RiskMetrics:
     """风险指标"""
     var_95: float  # 95% VaR
@@ -27,7 +55,7 @@ class RiskMetrics:
     correlation_matrix: Optional[np.ndarray] = None  # 相关性矩阵
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class RiskAlert:
     """风险警报"""
     alert_id: str
@@ -41,17 +69,256 @@ class RiskAlert:
     action_required: Optional[str] = None
 
 
+@dataclass
+class _MarketSeries:
+    """单个交易对的价格/成交量环形缓冲区"""
+    prices: np.ndarray
+    volumes: np.ndarray
+    write: int = 0
+    count: int = 0
+    # 窗口内收益率的滚动Welford统计量
+    returns_n: int = 0
+    returns_mean: float = 0.0
+    returns_m2: float = 0.0
+    
+    @classmethod
+    def create(cls, size: int = HISTORY_SIZE) -> "_MarketSeries":
+        return cls(prices=np.empty(size, dtype=np.float64),
+                   volumes=np.full(size, np.nan, dtype=np.float64))
+    
+    def reset(self):
+        """清空缓冲区和收益率统计量"""
+        self.volumes.fill(np.nan)
+        self.write = 0
+        self.count = 0
+        self.returns_n = 0
+        self.returns_mean = 0.0
+        self.returns_m2 = 0.0
+    
+    def append(self, price: float, volume: float = np.nan):
+        """原地写入一个数据点，满后覆盖最旧的数据"""
+        size = len(self.prices)
+        idx = self.write % size
+        
+        # 缓冲区已满：最旧的收益率移出窗口
+        if self.count == size:
+            oldest = self.prices[idx]
+            self._remove_return((self.prices[(idx + 1) % size] - oldest) / oldest)
+        
+        # 新收益率加入窗口
+        if self.count > 0:
+            last = self.prices[idx - 1]
+            self._add_return((price - last) / last)
+        
+        self.prices[idx] = price
+        self.volumes[idx] = volume
+        self.write += 1
+        self.count = min(self.count + 1, len(self.prices))
+    
+    def _add_return(self, x: float):
+        self.returns_n += 1
+        delta = x - self.returns_mean
+        self.returns_mean += delta / self.returns_n
+        self.returns_m2 += delta * (x - self.returns_mean)
+    
+    def _remove_return(self, x: float):
+        self.returns_n -= 1
+        if self.returns_n == 0:
+            self.returns_mean = 0.0
+            self.returns_m2 = 0.0
+            return
+        delta = x - self.returns_mean
+        self.returns_mean -= delta / self.returns_n
+        self.returns_m2 = max(self.returns_m2 - delta * (x - self.returns_mean), 0.0)
+    
+    def returns_std(self) -> float:
+        """窗口内收益率的标准差（总体标准差，与np.std一致）"""
+        if self.returns_n == 0:
+            return 0.0
+        return math.sqrt(self.returns_m2 / self.returns_n)
+    
+    def recent(self, n: int = None) -> np.ndarray:
+        """按时间顺序返回最近n个价格，未回绕时返回视图，回绕时拼接两段"""
+        n = self.count if n is None else min(n, self.count)
+        end = self.write % len(self.prices)
+        start = end - n
+        if start >= 0:
+            return self.prices[start:end]
+        return np.concatenate((self.prices[start:], self.prices[:end]))
+
+
+class _AlertStore:
+    """警报环形存储（列式）
+    
+    数值字段保存在定长numpy数组中，严重程度和风险类型编码为uint8，
+    只有文本字段使用Python列表；查询时向量化筛选，只为命中的警报构造RiskAlert。
+    时间戳为单调时钟纳秒数，只在构造RiskAlert时换算为墙上时间。
+    """
+    
+    def __init__(self, size: int = ALERT_HISTORY_SIZE):
+        self.size = size
+        self.write = 0
+        self.count = 0
+        # 单调时钟与墙上时间的对应基准
+        self.epoch_wall = time.time()
+        self.epoch_mono = time.monotonic_ns()
+        self.ts = np.empty(size, dtype=np.int64)
+        self.severity = np.empty(size, dtype=np.uint8)
+        self.risk_type = np.empty(size, dtype=np.uint8)
+        self.value = np.empty(size, dtype=np.float64)
+        self.threshold = np.empty(size, dtype=np.float64)
+        self.alert_id: List[Optional[str]] = [None] * size
+        self.message: List[Optional[str]] = [None] * size
+        self.symbol: List[Optional[str]] = [None] * size
+        self.action_required: List[Optional[str]] = [None] * size
+        # 字符串 <-> uint8编码
+        self._codes: Dict[str, int] = {}
+        self._names: List[str] = []
+        # 活跃窗口内各严重程度的计数，窗口起点（绝对写入序号）随时间单调前移
+        self._active_start = 0
+        self._active_counts: Counter = Counter()
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def _encode(self, name: str) -> int:
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self._names)
+            self._names.append(name)
+        return code
+    
+    def wall_time(self, ts_ns: int) -> float:
+        """单调时钟纳秒数换算为Unix时间戳"""
+        return self.epoch_wall + (ts_ns - self.epoch_mono) / 1e9
+    
+    def append(self, ts_ns: int, alert_id: str, risk_type: str, severity: str, message: str,
+               symbol: str = None, value: float = None, threshold: float = None,
+               action_required: str = None) -> int:
+        """写入警报，满后覆盖最旧的警报，返回写入位置"""
+        # 被覆盖的警报先移出活跃窗口
+        if self.count == self.size:
+            self._retire(self.write - self.size + 1)
+        
+        idx = self.write % self.size
+        code = self._encode(severity)
+        self._active_counts[code] += 1
+        self.ts[idx] = ts_ns
+        self.severity[idx] = code
+        self.risk_type[idx] = self._encode(risk_type)
+        self.value[idx] = np.nan if value is None else value
+        self.threshold[idx] = np.nan if threshold is None else threshold
+        self.alert_id[idx] = alert_id
+        self.message[idx] = message
+        self.symbol[idx] = symbol
+        self.action_required[idx] = action_required
+        self.write += 1
+        self.count = min(self.count + 1, self.size)
+        return idx
+    
+    def _indices_after(self, cutoff: int) -> np.ndarray:
+        """时间晚于cutoff的警报下标（按时间顺序），时间戳有序，二分定位"""
+        order = np.arange(self.write - self.count, self.write) % self.size
+        start = np.searchsorted(self.ts[order], cutoff, side='right')
+        return order[start:]
+    
+    def select(self, cutoff: int, severity: str = None, risk_type: str = None) -> np.ndarray:
+        """按时间、严重程度、风险类型筛选警报下标"""
+        indices = self._indices_after(cutoff)
+        for column, name in ((self.severity, severity), (self.risk_type, risk_type)):
+            if name:
+                code = self._codes.get(name)
+                if code is None:
+                    return indices[:0]
+                indices = indices[column[indices] == code]
+        return indices
+    
+    def _retire(self, until: int):
+        """活跃窗口起点前移到until，扣减移出警报的计数"""
+        while self._active_start < until:
+            self._active_counts[int(self.severity[self._active_start % self.size])] -= 1
+            self._active_start += 1
+    
+    def active_summary(self, cutoff: int) -> Tuple[int, Dict[str, int]]:
+        """时间晚于cutoff的警报总数及各严重程度数量
+        
+        cutoff随时间单调递增，只需从窗口起点移出已过期的警报，摊还O(1)。
+        """
+        while self._active_start < self.write and self.ts[self._active_start % self.size] <= cutoff:
+            self._retire(self._active_start + 1)
+        counts = {self._names[code]: n for code, n in self._active_counts.items() if n}
+        return self.write - self._active_start, counts
+    
+    def materialize(self, idx: int) -> RiskAlert:
+        """构造单个警报对象"""
+        value = self.value[idx]
+        threshold = self.threshold[idx]
+        return RiskAlert(
+            alert_id=self.alert_id[idx],
+            risk_type=self._names[self.risk_type[idx]],
+            severity=self._names[self.severity[idx]],
+            message=self.message[idx],
+            timestamp=datetime.fromtimestamp(self.wall_time(int(self.ts[idx]))),
+            symbol=self.symbol[idx],
+            value=None if np.isnan(value) else float(value),
+            threshold=None if np.isnan(threshold) else float(threshold),
+            action_required=self.action_required[idx]
+        )
+    
+    def drop_before(self, cutoff: int):
+        """丢弃时间不晚于cutoff的警报（均位于最旧的一端）"""
+        self.count = len(self._indices_after(cutoff))
+        self._retire(self.write - self.count)
+
+
+@dataclass
+class _PortfolioView:
+    """组合快照：交易对顺序与对应的缓冲区、权重、仓位数组，组合变化时重建"""
+    symbols: Tuple[str, ...]
+    series: Tuple[_MarketSeries, ...]
+    raw_weights: np.ndarray
+    weights: np.ndarray  # 已标准化
+    sizes: np.ndarray
+    # 持仓交易对的列式数据，当前价格随行情更新原地写入
+    position_symbols: Tuple[str, ...]
+    position_rows: Dict[str, int]
+    position_sizes: np.ndarray
+    entry_prices: np.ndarray
+    current_prices: np.ndarray
+    
+    @staticmethod
+    def normalize(weights: np.ndarray) -> np.ndarray:
+        """标准化权重，权重和为0时等权"""
+        total_weight = weights.sum()
+        if total_weight > 0:
+            return weights / total_weight
+        return np.full(len(weights), 1.0 / len(weights)) if len(weights) else weights
+
+
 class RiskEngine:
     """风控引擎"""
     
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.is_running = False
-        self.alerts: List[RiskAlert] = []
+        # 最近ALERT_HISTORY_SIZE个警报，按创建时间顺序列式保存
+        self._alert_store = _AlertStore()
         self.position_limits = {}
         self.risk_metrics = {}
+        # 各交易对的最新数据（不含历史：market_data[symbol]['price_history'] 已不存在，
+        # 历史价格保存在 market_series[symbol] 中，通过 recent() 读取）
         self.market_data = {}
+        self.market_series: Dict[str, _MarketSeries] = {}
         self.portfolio_data = {}
+        # 最大回撤缓存，市场或组合数据更新时失效
+        self._drawdown_cache: Optional[float] = None
+        # 组合快照，组合数据或交易对集合变化时失效
+        self._portfolio_view: Optional[_PortfolioView] = None
+        # 数据更新计数，VaR结果在计数不变时复用
+        self._update_tick = 0
+        self._var_cache_tick = -1
+        self._var_cache_key = None
+        self._var_cache: Optional[RiskMetrics] = None
         
         # 风险阈值
         self.risk_thresholds = {
@@ -67,24 +334,42 @@ class RiskEngine:
         self.check_interval = config.get('check_interval', 60)  # 秒
         
         self.callbacks = []
+        # 协程回调（添加时判断一次），通知时以任务方式调度
+        self._coroutine_callbacks = set()
+        self._callback_tasks = set()
     
     def add_callback(self, callback):
-        """添加风险警报回调"""
+        """添加风险警报回调（支持普通函数和协程函数）"""
         self.callbacks.append(callback)
+        if asyncio.iscoroutinefunction(callback):
+            self._coroutine_callbacks.add(callback)
     
     def remove_callback(self, callback):
         """移除风险警报回调"""
         if callback in self.callbacks:
             self.callbacks.remove(callback)
+            if callback not in self.callbacks:
+                self._coroutine_callbacks.discard(callback)
     
     def notify_callbacks(self, alert: RiskAlert):
         """通知所有回调"""
         for callback in self.callbacks:
             try:
-                callback(alert)
+                if callback in self._coroutine_callbacks:
+                    task = asyncio.get_running_loop().create_task(callback(alert))
+                    self._callback_tasks.add(task)
+                    task.add_done_callback(self._on_callback_done)
+                else:
+                    callback(alert)
             except Exception as e:
                 logger.error(f"风险警报回调失败: {e}")
     
+    def _on_callback_done(self, task: asyncio.Task):
+        """协程回调结束，记录异常"""
+        self._callback_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"风险警报回调失败: {task.exception()}")
+    
     async def start(self):
         """启动风控引擎"""
         self.is_running = True
@@ -115,31 +400,55 @@ class RiskEngine:
     async def _perform_risk_checks(self):
         """执行风险检查"""
         try:
-            # 检查仓位风险
-            await self._check_position_risks()
-            
-            # 检查市场风险
-            await self._check_market_risks()
+            # 各项检查互不依赖，并发执行：组合风险的数值计算在线程中进行时，
+            # 仓位、市场风险检查可在事件循环上同时完成
+            checks = [
+                self._check_position_risks(),  # 检查仓位风险
+                self._check_market_risks(),  # 检查市场风险
+                self._check_portfolio_risks(),  # 检查组合风险
+            ]
+            # 系统风险检查只在子类实现时执行
+            if type(self)._check_system_risks is not RiskEngine._check_system_risks:
+                checks.append(self._check_system_risks())
             
-            # 检查组合风险
-            await self._check_portfolio_risks()
+            results = await asyncio.gather(*checks, return_exceptions=True)
             
-            # 检查系统风险
-            await self._check_system_risks()
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.error(f"风险检查失败: {result}")
             
         except Exception as e:
             logger.error(f"风险检查失败: {e}")
     
     async def _check_position_risks(self):
         """检查仓位风险"""
-        for symbol, position_data in self.portfolio_data.items():
+        # 阈值和行情字典在循环外绑定为局部变量
+        max_position = self.risk_thresholds['max_position_size']
+        max_loss = self.risk_thresholds['max_daily_loss']
+        
+        try:
+            view = self._get_portfolio_view()
+            sizes = view.position_sizes
+            current = view.current_prices
+            entry = view.entry_prices
+            
+            # 两项检查对全部持仓一次向量化比较完成
+            over_size = np.abs(sizes) > max_position
+            priced = (current > 0) & (entry > 0)
+            pnl = np.divide(current - entry, entry, out=np.zeros_like(entry), where=priced)
+            loss_hits = priced & (pnl < -max_loss)
+        except Exception as e:
+            logger.error(f"检查仓位风险失败: {e}")
+            return
+        
+        # 只有触发阈值的交易对进入Python循环
+        for i in np.flatnonzero(over_size | loss_hits):
+            symbol = view.position_symbols[i]
             try:
                 # 检查单仓位大小
-                position_size = position_data.get('position_size', 0)
-                max_position = self.risk_thresholds['max_position_size']
-                
-                if abs(position_size) > max_position:
-                    await self._create_alert(
+                if over_size[i]:
+                    position_size = float(sizes[i])
+                    self._create_alert(
                         risk_type="position_size",
                         severity="high",
                         message=f"{symbol} 仓位过大: {position_size:.2%} > {max_position:.2%}",
@@ -149,24 +458,18 @@ class RiskEngine:
                         action_required="reduce_position"
                     )
                 
-                # 检查止损
-                current_price = self.market_data.get(symbol, {}).get('price', 0)
-                entry_price = position_data.get('entry_price', 0)
-                
-                if current_price > 0 and entry_price > 0:
-                    pnl_pct = (current_price - entry_price) / entry_price
-                    
-                    # 检查最大日损失
-                    if pnl_pct < -self.risk_thresholds['max_daily_loss']:
-                        await self._create_alert(
-                            risk_type="daily_loss",
-                            severity="critical",
-                            message=f"{symbol} 日损失过大: {pnl_pct:.2%}",
-                            symbol=symbol,
-                            value=pnl_pct,
-                            threshold=-self.risk_thresholds['max_daily_loss'],
-                            action_required="stop_loss"
-                        )
+                # 检查最大日损失
+                if loss_hits[i]:
+                    pnl_pct = float(pnl[i])
+                    self._create_alert(
+                        risk_type="daily_loss",
+                        severity="critical",
+                        message=f"{symbol} 日损失过大: {pnl_pct:.2%}",
+                        symbol=symbol,
+                        value=pnl_pct,
+                        threshold=-max_loss,
+                        action_required="stop_loss"
+                    )
                 
             except Exception as e:
                 logger.error(f"检查 {symbol} 仓位风险失败: {e}")
@@ -174,22 +477,23 @@ class RiskEngine:
     async def _check_market_risks(self):
         """检查市场风险"""
         try:
+            max_volatility = self.risk_thresholds['max_volatility']
+            annualize = math.sqrt(252)
+            
             # 检查市场波动率
-            for symbol, market_data in self.market_data.items():
-                price_data = market_data.get('price_history', [])
-                
-                if len(price_data) >= 30:  # 需要30个数据点计算波动率
-                    returns = np.diff(price_data) / price_data[:-1]
-                    volatility = np.std(returns) * np.sqrt(252)  # 年化波动率
+            for symbol, series in self.market_series.items():
+                if series.count >= 30:  # 需要30个数据点计算波动率
+                    # 收益率统计量在写入价格时增量维护
+                    volatility = series.returns_std() * annualize  # 年化波动率
                     
-                    if volatility > self.risk_thresholds['max_volatility']:
-                        await self._create_alert(
+                    if volatility > max_volatility:
+                        self._create_alert(
                             risk_type="high_volatility",
                             severity="medium",
                             message=f"{symbol} 市场波动率过高: {volatility:.2%}",
                             symbol=symbol,
                             value=volatility,
-                            threshold=self.risk_thresholds['max_volatility'],
+                            threshold=max_volatility,
                             action_required="reduce_position"
                         )
                 
@@ -199,29 +503,33 @@ class RiskEngine:
     async def _check_portfolio_risks(self):
         """检查组合风险"""
         try:
+            thresholds = self.risk_thresholds
+            max_var_95 = thresholds['max_var_95']
+            
             # 计算组合VaR
             var_metrics = await self.calculate_var()
             
-            if var_metrics and var_metrics.var_95 > self.risk_thresholds['max_var_95']:
-                await self._create_alert(
+            if var_metrics and var_metrics.var_95 > max_var_95:
+                self._create_alert(
                     risk_type="portfolio_var",
                     severity="high",
                     message=f"组合VaR过高: {var_metrics.var_95:.2%}",
                     value=var_metrics.var_95,
-                    threshold=self.risk_thresholds['max_var_95'],
+                    threshold=max_var_95,
                     action_required="reduce_risk"
                 )
             
             # 检查最大回撤
             drawdown = await self.calculate_max_drawdown()
+            max_drawdown = thresholds['max_drawdown']
             
-            if drawdown > self.risk_thresholds['max_drawdown']:
-                await self._create_alert(
+            if drawdown > max_drawdown:
+                self._create_alert(
                     risk_type="max_drawdown",
                     severity="critical",
                     message=f"组合最大回撤过大: {drawdown:.2%}",
                     value=drawdown,
-                    threshold=self.risk_thresholds['max_drawdown'],
+                    threshold=max_drawdown,
                     action_required="emergency_stop"
                 )
                 
@@ -229,133 +537,151 @@ class RiskEngine:
             logger.error(f"检查组合风险失败: {e}")
     
     async def _check_system_risks(self):
-        """检查系统风险"""
-        try:
-            # 检查API连接状态
-            # 检查数据延迟
-            # 检查系统负载等
-            pass
-            
-        except Exception as e:
-            logger.error(f"检查系统风险失败: {e}")
+        """检查系统风险（API连接状态、数据延迟、系统负载等，由子类实现）"""
+        return
     
-    async def _create_alert(self, risk_type: str, severity: str, message: str,
-                          symbol: str = None, value: float = None, 
-                          threshold: float = None, action_required: str = None):
+    def _create_alert(self, risk_type: str, severity: str, message: str,
+                      symbol: str = None, value: float = None, 
+                      threshold: float = None, action_required: str = None):
         """创建风险警报"""
-        alert = RiskAlert(
-            alert_id=f"{risk_type}_{int(time.time())}",
+        store = self._alert_store
+        ts_ns = time.monotonic_ns()
+        
+        # 添加到警报存储（保持最近ALERT_HISTORY_SIZE个警报）
+        idx = store.append(
+            ts_ns,
+            alert_id=f"{risk_type}_{int(store.wall_time(ts_ns))}",
             risk_type=risk_type,
             severity=severity,
             message=message,
-            timestamp=datetime.now(),
             symbol=symbol,
             value=value,
             threshold=threshold,
             action_required=action_required
         )
         
-        # 添加到警报列表
-        self.alerts.append(alert)
-        
-        # 保持最近1000个警报
-        if len(self.alerts) > 1000:
-            self.alerts = self.alerts[-1000:]
-        
-        # 通知回调
-        self.notify_callbacks(alert)
-        
-        # 记录日志
-        log_level = {
-            'low': logging.INFO,
-            'medium': logging.WARNING,
-            'high': logging.ERROR,
-            'critical': logging.CRITICAL
-        }.get(severity, logging.INFO)
+        # 通知回调（有回调时才构造警报对象）
+        if self.callbacks:
+            self.notify_callbacks(store.materialize(idx))
         
-        logger.log(log_level, f"[{severity.upper()}] {message}")
+        # 记录日志（消息已格式化，日志级别未开启时不再做任何字符串处理）
+        logger.log(SEVERITY_LOG_LEVELS.get(severity, logging.INFO), "[%s] %s", severity.upper(), message)
     
     def update_market_data(self, symbol: str, data: Dict[str, Any]):
-        """更新市场数据"""
+        """更新市场数据
+        
+        data中的price_history会替换该交易对已有的历史价格（而不是追加），
+        price再作为最新数据点写入。历史价格只保存在market_series中，
+        market_data[symbol]不再包含price_history。
+        """
+        self._update_tick += 1
+        self._drawdown_cache = None
         if symbol not in self.market_data:
-            self.market_data[symbol] = {
-                'price_history': [],
-                'volume_history': [],
-                'timestamp_history': []
-            }
+            self.market_data[symbol] = {}
+            self.market_series[symbol] = _MarketSeries.create()
+            self._portfolio_view = None
+        series = self.market_series[symbol]
+        
+        # 传入的历史价格替换缓冲区中已有的历史
+        price_history = data.get('price_history')
+        if price_history is not None:
+            series.reset()
+            for price in price_history:
+                series.append(price)
         
         # 更新最新数据
-        self.market_data[symbol].update(data)
+        self.market_data[symbol].update(
+            (k, v) for k, v in data.items() if k != 'price_history'
+        )
         
-        # 保存历史数据（保留最近1000个数据点）
+        # 保存历史数据（保留最近HISTORY_SIZE个数据点）
         if 'price' in data:
-            price_history = self.market_data[symbol]['price_history']
-            price_history.append(data['price'])
+            series.append(data['price'], data.get('volume', np.nan))
             
-            if len(price_history) > 1000:
-                price_history.pop(0)
-            
-            self.market_data[symbol]['price_history'] = price_history
+            # 同步组合快照中的当前价格
+            view = self._portfolio_view
+            if view is not None:
+                row = view.position_rows.get(symbol)
+                if row is not None:
+                    view.current_prices[row] = data['price']
     
     def update_portfolio_data(self, symbol: str, data: Dict[str, Any]):
         """更新组合数据"""
         self.portfolio_data[symbol] = data
+        self._update_tick += 1
+        self._drawdown_cache = None
+        self._portfolio_view = None
+    
+    def _get_portfolio_view(self) -> _PortfolioView:
+        """获取组合快照（无变化时复用）"""
+        if self._portfolio_view is None:
+            symbols = tuple(self.market_series)
+            positions = [self.portfolio_data.get(symbol, {}) for symbol in symbols]
+            raw_weights = np.array([p.get('weight', 0) for p in positions], dtype=np.float64)
+            
+            position_symbols = tuple(self.portfolio_data)
+            held = self.portfolio_data.values()
+            self._portfolio_view = _PortfolioView(
+                symbols=symbols,
+                series=tuple(self.market_series[symbol] for symbol in symbols),
+                raw_weights=raw_weights,
+                weights=_PortfolioView.normalize(raw_weights),
+                sizes=np.array([p.get('position_size', 0) for p in positions], dtype=np.float64),
+                position_symbols=position_symbols,
+                position_rows={symbol: i for i, symbol in enumerate(position_symbols)},
+                position_sizes=np.array([p.get('position_size', 0) for p in held], dtype=np.float64),
+                entry_prices=np.array([p.get('entry_price', 0) for p in held], dtype=np.float64),
+                current_prices=np.array(
+                    [self.market_data.get(symbol, {}).get('price', 0) for symbol in position_symbols],
+                    dtype=np.float64
+                )
+            )
+        return self._portfolio_view
     
     async def calculate_var(self, confidence_levels: List[float] = [0.95, 0.99],
                           time_horizon: int = 1) -> Optional[RiskMetrics]:
         """计算风险价值(VaR)"""
+        # 上次计算后没有新的市场/组合数据时直接返回缓存结果
+        tick = self._update_tick
+        cache_key = (tuple(confidence_levels), time_horizon)
+        if tick == self._var_cache_tick and cache_key == self._var_cache_key:
+            return self._var_cache
+        
         try:
-            # 收集所有资产收益率
-            returns_data = []
-            
-            for symbol, market_data in self.market_data.items():
-                price_history = market_data.get('price_history', [])
-                
-                if len(price_history) >= 100:  # 需要足够的历史数据
-                    returns = np.diff(price_history) / price_history[:-1]
-                    returns_data.append(returns)
-            
-            if not returns_data:
-                return None
+            view = self._get_portfolio_view()
             
-            # 计算组合收益率
-            portfolio_weights = []
-            for symbol in self.market_data.keys():
-                position_data = self.portfolio_data.get(symbol, {})
-                weight = position_data.get('weight', 0)
-                portfolio_weights.append(weight)
+            # 收集历史数据足够的交易对
+            eligible = [i for i, series in enumerate(view.series) if series.count >= 100]
+            if not eligible:
+                return self._store_var_cache(tick, cache_key, None)
             
-            # 标准化权重
-            total_weight = sum(portfolio_weights)
-            if total_weight > 0:
-                portfolio_weights = [w / total_weight for w in portfolio_weights]
+            # 全部交易对都满足时直接使用快照中已标准化的权重
+            if len(eligible) == len(view.series):
+                series_list = view.series
+                weights = view.weights
             else:
-                portfolio_weights = [1.0 / len(portfolio_weights)] * len(portfolio_weights)
+                series_list = [view.series[i] for i in eligible]
+                weights = _PortfolioView.normalize(view.raw_weights[eligible])
             
-            # 计算组合收益率
-            portfolio_returns = np.zeros(len(returns_data[0]))
-            for i, returns in enumerate(returns_data):
-                portfolio_returns += returns * portfolio_weights[i]
+            # 按共同长度对齐，堆叠为 [交易对, 时间] 二维数组
+            n_points = min(series.count for series in series_list)
+            prices = np.empty((len(series_list), n_points), dtype=np.float64)
+            for i, series in enumerate(series_list):
+                prices[i] = series.recent(n_points)
             
-            # 计算VaR
-            var_values = {}
-            for confidence in confidence_levels:
-                var_values[f'var_{int(confidence*100)}'] = -np.percentile(portfolio_returns, (1-confidence)*100)
-            
-            # 计算其他风险指标
-            volatility = np.std(portfolio_returns) * np.sqrt(252)
-            mean_return = np.mean(portfolio_returns) * 252
-            
-            # 夏普比率
+            # 计算VaR及其他风险指标（CPU密集，放到线程中执行；
+            # 内核不使用上下文变量，直接提交到默认线程池，省去asyncio.to_thread的上下文复制）
+            confidences = np.asarray(confidence_levels, dtype=np.float64)
             risk_free_rate = 0.02  # 假设无风险利率2%
-            sharpe_ratio = (mean_return - risk_free_rate) / volatility if volatility > 0 else 0
-            
-            # 索提诺比率
-            downside_returns = portfolio_returns[portfolio_returns < 0]
-            downside_volatility = np.std(downside_returns) * np.sqrt(252) if len(downside_returns) > 0 else 0
-            sortino_ratio = (mean_return - risk_free_rate) / downside_volatility if downside_volatility > 0 else 0
+            var_array, volatility, sharpe_ratio, sortino_ratio = await asyncio.get_running_loop().run_in_executor(
+                None, var_kernel, prices, weights, confidences, 252.0, risk_free_rate
+            )
+            var_values = {
+                f'var_{int(confidence*100)}': float(var)
+                for confidence, var in zip(confidence_levels, var_array)
+            }
             
-            return RiskMetrics(
+            metrics = RiskMetrics(
                 var_95=var_values.get('var_95', 0),
                 var_99=var_values.get('var_99', 0),
                 max_drawdown=await self.calculate_max_drawdown(),
@@ -365,90 +691,132 @@ class RiskEngine:
                 beta=1.0,  # 需要市场数据计算
                 correlation_matrix=None
             )
+            return self._store_var_cache(tick, cache_key, metrics)
             
         except Exception as e:
             logger.error(f"计算VaR失败: {e}")
             return None
     
+    def _store_var_cache(self, tick: int, cache_key: tuple,
+                         metrics: Optional[RiskMetrics]) -> Optional[RiskMetrics]:
+        """保存VaR结果，计算期间数据已更新时不缓存"""
+        if tick == self._update_tick:
+            self._var_cache_tick = tick
+            self._var_cache_key = cache_key
+            self._var_cache = metrics
+        return metrics
+    
     async def calculate_max_drawdown(self) -> float:
-        """计算最大回撤"""
+        """计算最大回撤（基于最近DRAWDOWN_WINDOW个数据点的组合价值曲线）"""
+        if self._drawdown_cache is not None:
+            return self._drawdown_cache
+        
         try:
-            # 计算组合价值曲线
-            portfolio_values = []
-            
-            for i in range(100):  # 假设100个时间点
-                portfolio_value = 0
-                for symbol, market_data in self.market_data.items():
-                    price_history = market_data.get('price_history', [])
-                    if i < len(price_history):
-                        price = price_history[i]
-                    else:
-                        price = price_history[-1] if price_history else 0
-                    
-                    position_data = self.portfolio_data.get(symbol, {})
-                    position_size = position_data.get('position_size', 0)
-                    portfolio_value += price * position_size
-                
-                portfolio_values.append(portfolio_value)
-            
-            if len(portfolio_values) < 2:
+            view = self._get_portfolio_view()
+            if not view.symbols:
                 return 0.0
             
-            # 计算回撤
+            # 价格矩阵 [交易对, 时间]，各交易对按最新数据右对齐，不足部分用最早价格填充
+            prices = np.zeros((len(view.symbols), DRAWDOWN_WINDOW), dtype=np.float64)
+            for i, series in enumerate(view.series):
+                recent = series.recent(DRAWDOWN_WINDOW)
+                if len(recent):
+                    prices[i, DRAWDOWN_WINDOW - len(recent):] = recent
+                    prices[i, :DRAWDOWN_WINDOW - len(recent)] = recent[0]
+            
+            # 计算组合价值曲线及回撤
+            portfolio_values = view.sizes @ prices
             peak = np.maximum.accumulate(portfolio_values)
-            drawdown = (peak - portfolio_values) / peak
+            drawdown = np.divide(peak - portfolio_values, peak,
+                                 out=np.zeros_like(peak), where=peak > 0)
             
-            return np.max(drawdown)
+            self._drawdown_cache = float(drawdown.max())
+            return self._drawdown_cache
             
         except Exception as e:
             logger.error(f"计算最大回撤失败: {e}")
             return 0.0
     
+    async def monitor_portfolio_risk(self, portfolio: Dict[str, float],
+                                     covariance: Optional[np.ndarray] = None) -> Dict[str, float]:
+        """计算组合风险指标（portfolio为 {交易对: 持仓价值}）
+        
+        传入与portfolio顺序一致的收益率协方差矩阵（须已换算到与历史模拟法相同的1日期限）时
+        按参数法计算VaR（O(N²)），否则使用历史模拟法VaR并按组合价值换算为金额；数值计算在calculate_var中放到线程执行。
+        """
+        exposures = np.fromiter(portfolio.values(), dtype=np.float64, count=len(portfolio))
+        values = np.abs(exposures)
+        portfolio_value = float(values.sum())
+        
+        if covariance is not None and covariance.shape == (len(exposures), len(exposures)):
+            # 组合价值收益的标准差 sqrt(vᵀΣv)
+            sigma = math.sqrt(max(float(exposures @ covariance @ exposures), 0.0))
+            var_95 = Z_95 * sigma
+            var_99 = Z_99 * sigma
+        else:
+            var_metrics = await self.calculate_var()
+            var_95 = var_metrics.var_95 * portfolio_value if var_metrics else 0.0
+            var_99 = var_metrics.var_99 * portfolio_value if var_metrics else 0.0
+        
+        return {
+            "portfolio_value": portfolio_value,
+            "var_95": var_95,
+            "var_99": var_99,
+            "max_drawdown": await self.calculate_max_drawdown(),
+            # 集中度：最大单一持仓占组合价值的比例
+            "concentration_risk": float(values.max()) / portfolio_value if portfolio_value > 0 else 0.0
+        }
+    
     def get_risk_metrics(self, symbol: str = None) -> Dict[str, Any]:
         """获取风险指标"""
         if symbol:
             return self.risk_metrics.get(symbol, {})
         return self.risk_metrics.copy()
     
+    @property
+    def alerts(self) -> List[RiskAlert]:
+        """全部保存的警报（按时间顺序）"""
+        store = self._alert_store
+        return [store.materialize(i) for i in store._indices_after(np.iinfo(np.int64).min)]
+    
     def get_active_alerts(self, severity: str = None, 
-                         risk_type: str = None) -> List[RiskAlert]:
-        """获取活跃警报"""
-        alerts = self.alerts.copy()
-        
-        if severity:
-            alerts = [a for a in alerts if a.severity == severity]
-        
-        if risk_type:
-            alerts = [a for a in alerts if a.risk_type == risk_type]
-        
+                         risk_type: str = None, limit: int = None) -> List[RiskAlert]:
+        """获取活跃警报（按时间顺序），limit指定时只返回最新的limit个"""
         # 只返回最近24小时的警报
-        cutoff_time = datetime.now() - timedelta(hours=24)
-        alerts = [a for a in alerts if a.timestamp > cutoff_time]
-        
-        return alerts
+        cutoff_ns = time.monotonic_ns() - 24 * NS_PER_HOUR
+        store = self._alert_store
+        indices = store.select(cutoff_ns, severity, risk_type)
+        if limit is not None:
+            indices = indices[len(indices) - limit:] if limit < len(indices) else indices
+        return [store.materialize(i) for i in indices]
+    
+    def count_active_alerts(self) -> int:
+        """活跃警报数量（最近24小时，增量计数，不构造警报对象）"""
+        cutoff_ns = time.monotonic_ns() - 24 * NS_PER_HOUR
+        return self._alert_store.active_summary(cutoff_ns)[0]
     
     def clear_alerts(self, older_than_hours: int = 24):
         """清除过期警报"""
-        cutoff_time = datetime.now() - timedelta(hours=older_than_hours)
-        self.alerts = [a for a in self.alerts if a.timestamp > cutoff_time]
+        cutoff_ns = time.monotonic_ns() - int(older_than_hours * NS_PER_HOUR)
+        self._alert_store.drop_before(cutoff_ns)
     
     def update_risk_thresholds(self, new_thresholds: Dict[str, float]):
         """更新风险阈值"""
         self.risk_thresholds.update(new_thresholds)
-        logger.info(f"风险阈值已更新: {new_thresholds}")
+        self._var_cache_tick = -1
+        logger.info("风险阈值已更新: %s", new_thresholds)
     
     def get_risk_summary(self) -> Dict[str, Any]:
         """获取风险摘要"""
-        recent_alerts = self.get_active_alerts()
-        
-        alert_counts = {}
-        for alert in recent_alerts:
-            alert_counts[alert.severity] = alert_counts.get(alert.severity, 0) + 1
+        # 最近24小时的警报计数增量维护，只构造最新的一个警报对象
+        cutoff_ns = time.monotonic_ns() - 24 * NS_PER_HOUR
+        store = self._alert_store
+        total_alerts, alert_counts = store.active_summary(cutoff_ns)
         
         return {
-            'total_alerts': len(recent_alerts),
+            'total_alerts': total_alerts,
             'alert_counts': alert_counts,
-            'latest_alert': recent_alerts[-1] if recent_alerts else None,
+            'latest_alert': store.materialize((store.write - 1) % store.size) if total_alerts else None,
             'risk_thresholds': self.risk_thresholds,
             'monitored_symbols': list(self.market_data.keys()),
             'portfolio_value': self._calculate_portfolio_value(),
@@ -3,19 +3,83 @@
 实时监控交易风险，集成风控引擎和策略回测
 """
 import asyncio
+import functools
+import heapq
+import itertools
+import sys
 import time
-from typing import Dict, List, Optional, Callable
+from collections import deque
+from typing import TYPE_CHECKING, Any, Awaitable, Deque, Dict, List, Optional, Callable, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass
 import logging
+import numpy as np
 
-from risk_management.risk_engine import RiskEngine, RiskAlert
-from strategies.backtesting import BacktestManager
 from config.risk_config import RiskLevel, RiskType, RISK_CONFIG, ALERT_CONFIG
 
+# 风控引擎与回测模块只在创建监控器时导入，这里仅用于类型标注
+if TYPE_CHECKING:
+    from risk_management.risk_engine import RiskEngine, RiskAlert
+    from strategies.backtesting import BacktestManager
+
 logger = logging.getLogger(__name__)
 
-@dataclass
+# 同时执行的订阅者回调上限
+NOTIFY_CONCURRENCY = 16
+# 保留的风险事件及每种风险类型的监控历史数量
+HISTORY_SIZE = 1000
+# 待处理警报队列容量
+ALERT_QUEUE_SIZE = 1024
+# 滚动协方差至少需要的收益率样本数
+MIN_COVARIANCE_PERIODS = 30
+# 参数法VaR的期限（秒）：与风险引擎历史模拟VaR一致，按1日计算
+VAR_HORIZON_SECONDS = 24 * 3600
+# 需要监控处理的警报级别
+HIGH_SEVERITIES = frozenset(("high", "critical"))
+
+# 风险等级查找表：阈值升序排列，np.searchsorted得到的区间下标即对应等级（None表示不触发）
+# 市场波动率：(0.1, 0.2] 中风险，> 0.2 高风险
+MARKET_VOLATILITY_THRESHOLDS = np.array([0.1, 0.2])
+MARKET_VOLATILITY_LEVELS = (None, RiskLevel.MEDIUM, RiskLevel.HIGH)
+# 流动性评分：< 0.3 高风险，[0.3, 0.5) 中风险
+LIQUIDITY_SCORE_THRESHOLDS = np.array([0.3, 0.5])
+LIQUIDITY_SCORE_LEVELS = (RiskLevel.HIGH, RiskLevel.MEDIUM, None)
+# 组合VaR（示例阈值）与集中度
+PORTFOLIO_VAR_THRESHOLDS = np.array([1000.0])
+PORTFOLIO_VAR_LEVELS = (None, RiskLevel.HIGH)
+CONCENTRATION_THRESHOLDS = np.array([0.3])
+CONCENTRATION_LEVELS = (None, RiskLevel.MEDIUM)
+
+def _classify(values: np.ndarray, thresholds: np.ndarray, levels: tuple, side: str):
+    """按查找表把数值映射为风险等级下标，返回 (触发警报的下标, 等级下标)
+    
+    side='left'表示严格大于阈值才进入上一区间，side='right'表示达到阈值即进入上一区间。
+    searchsorted会把NaN排在所有阈值之后，非有限值一律不触发警报。
+    """
+    level_index = np.searchsorted(thresholds, values, side=side)
+    triggers = np.fromiter((level is not None for level in levels), dtype=bool, count=len(levels))
+    return np.flatnonzero(triggers[level_index] & np.isfinite(values)), level_index
+
+def _level_of(value: float, thresholds: np.ndarray, levels: tuple, side: str):
+    """单个数值的风险等级，非有限值返回None"""
+    if not np.isfinite(value):
+        return None
+    return levels[np.searchsorted(thresholds, value, side=side)]
+
+# Python 3.12+ 的Task支持eager_start：同步完成的监控检查不再经过事件循环调度
+_EAGER_TASKS = sys.version_info >= (3, 12)
+
+# Python 3.10+ 的dataclass支持slots，事件对象不再各带一个__dict__
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# 时间函数绑定为模块级名称，热路径中省去属性查找
+_now = datetime.now
+_monotonic = time.monotonic
+
+# 风险事件ID序号（进程内唯一，同一秒内的多个事件不再重复）
+_event_counter = itertools.count()
+
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class RiskEvent:
     """风险事件"""
     event_id: str
@@ -28,32 +92,123 @@ class RiskEvent:
     threshold: float
     action_taken: str = ""
 
+@dataclass
+class MarketSnapshot:
+    """市场数据快照（列式：同一下标对应同一交易对）"""
+    symbols: Tuple[str, ...]
+    volatility: np.ndarray
+    price: np.ndarray
+
+@dataclass
+class LiquiditySnapshot:
+    """流动性数据快照（列式：同一下标对应同一交易对）"""
+    symbols: Tuple[str, ...]
+    liquidity_score: np.ndarray
+
+class _RollingCovariance:
+    """滚动窗口收益率协方差
+    
+    每次加入一行收益率、移出窗口外最旧的一行，均值与协方差矩阵做秩1增量更新（Welford），
+    每步 O(N²)，无需对整个窗口重新计算。
+    """
+    
+    def __init__(self, n_assets: int, lookback: int):
+        self.lookback = lookback
+        self.rows = np.empty((lookback, n_assets), dtype=np.float64)
+        self.write = 0
+        self.count = 0
+        self.mean = np.zeros(n_assets, dtype=np.float64)
+        self.comoment = np.zeros((n_assets, n_assets), dtype=np.float64)
+    
+    def update(self, row: np.ndarray) -> bool:
+        """加入一行收益率，窗口已满时先移出最旧的一行
+        
+        含NaN/无穷的行直接丢弃并返回False：这类值一旦进入均值和协方差，无法再通过移出窗口消除。
+        """
+        if not np.isfinite(row).all():
+            return False
+        idx = self.write % self.lookback
+        if self.count == self.lookback:
+            oldest = self.rows[idx]
+            self.count -= 1
+            if self.count == 0:
+                self.mean[:] = 0.0
+                self.comoment[:] = 0.0
+            else:
+                delta = oldest - self.mean
+                self.mean -= delta / self.count
+                self.comoment -= np.outer(delta, oldest - self.mean)
+        
+        self.count += 1
+        delta = row - self.mean
+        self.mean += delta / self.count
+        self.comoment += np.outer(delta, row - self.mean)
+        self.rows[idx] = row
+        self.write += 1
+        return True
+    
+    @property
+    def cov(self) -> Optional[np.ndarray]:
+        """样本协方差矩阵，样本不足时为None"""
+        if self.count < 2:
+            return None
+        return self.comoment / (self.count - 1)
+
 class RiskMonitor:
     """风险监控器"""
     
-    def __init__(self, risk_engine: RiskEngine, backtest_manager: BacktestManager):
+    def __init__(self, risk_engine: "RiskEngine", backtest_manager: "BacktestManager"):
         self.risk_engine = risk_engine
         self.backtest_manager = backtest_manager
         
         self.is_running = False
-        self.monitoring_tasks = {}
+        # 已调度的风险类型，全部由一个调度任务按到期时间依次执行
+        self.monitoring_tasks: List[str] = []
+        # 监控主任务：调度任务与警报处理任务在其中作为一组运行，停止时整体取消
+        self._monitoring_task: Optional[asyncio.Task] = None
+        # 监控调度：最小堆保存 (到期时间, 风险类型, 间隔)，只为最近的到期时间预约一个定时器
+        self._schedule: list = []
+        self._schedule_timer: Optional[asyncio.TimerHandle] = None
+        self._running_checks: Dict[str, asyncio.Task] = {}
+        self._spawn: Optional[Callable] = None
         self.subscribers: List[Callable] = []
-        self.risk_events: List[RiskEvent] = []
+        self._notify_semaphore = asyncio.Semaphore(NOTIFY_CONCURRENCY)
+        # 组合/市场/流动性数据缓存：key -> (获取时间, 数据)，各监控共用
+        self._data_cache: Dict[str, Tuple[float, Any]] = {}
+        self._data_locks: Dict[str, asyncio.Lock] = {}
+        self.risk_events: Deque[RiskEvent] = deque(maxlen=HISTORY_SIZE)
+        # 监控状态字典，查询时原地更新后返回（调用方只读）
+        self._status = {
+            "is_running": False,
+            "monitoring_tasks": 0,
+            "active_alerts": 0,
+            "risk_events": 0,
+            "subscribers": 0
+        }
+        
+        # 风险引擎产生的警报经回调放入队列，由警报处理任务消费
+        self.alert_queue: "asyncio.Queue[RiskAlert]" = asyncio.Queue(maxsize=ALERT_QUEUE_SIZE)
+        self.risk_engine.add_callback(self._on_engine_alert)
         
         # 监控配置
         self.monitoring_config = {
             "position_risk": {"interval": 30, "enabled": True},
             "market_risk": {"interval": 60, "enabled": True},
             "liquidity_risk": {"interval": 120, "enabled": True},
-            "portfolio_risk": {"interval": 300, "enabled": True}
+            "portfolio_risk": {"interval": 300, "enabled": True, "lookback": 100}
         }
         
-        # 监控历史
-        self.monitoring_history = {
-            "position_risk": [],
-            "market_risk": [],
-            "liquidity_risk": [],
-            "portfolio_risk": []
+        # 组合收益率滚动协方差，持仓交易对变化时重建
+        self._rolling: Optional[_RollingCovariance] = None
+        self._rolling_symbols: Tuple[str, ...] = ()
+        self._last_prices: Optional[np.ndarray] = None
+        
+        # 监控历史（每种风险类型保留最近HISTORY_SIZE条）
+        self.monitoring_history: Dict[str, Deque[Dict]] = {
+            "position_risk": deque(maxlen=HISTORY_SIZE),
+            "market_risk": deque(maxlen=HISTORY_SIZE),
+            "liquidity_risk": deque(maxlen=HISTORY_SIZE),
+            "portfolio_risk": deque(maxlen=HISTORY_SIZE)
         }
     
     async def start_monitoring(self):
@@ -61,17 +216,19 @@ class RiskMonitor:
         logger.info("启动风险监控服务")
         
         self.is_running = True
+        loop = asyncio.get_running_loop()
         
-        # 启动各个监控任务
-        for risk_type, config in self.monitoring_config.items():
-            if config["enabled"]:
-                task = asyncio.create_task(
-                    self._monitor_risk_type(risk_type, config["interval"])
-                )
-                self.monitoring_tasks[risk_type] = task
+        # 构建监控调度堆（按事件循环时间），启动时全部立即执行一次
+        now = loop.time()
+        self._schedule = [
+            (now, risk_type, config["interval"])
+            for risk_type, config in self.monitoring_config.items()
+            if config["enabled"]
+        ]
+        heapq.heapify(self._schedule)
+        self.monitoring_tasks = [risk_type for _, risk_type, _ in self._schedule]
         
-        # 启动警报处理任务
-        self.alert_task = asyncio.create_task(self._process_alerts())
+        self._monitoring_task = asyncio.create_task(self._run_monitoring())
         
         logger.info("风险监控服务已启动")
     
@@ -81,34 +238,89 @@ class RiskMonitor:
         
         self.is_running = False
         
-        # 取消所有监控任务
-        for task in self.monitoring_tasks.values():
+        # 取消调度定时器和正在执行的监控
+        if self._schedule_timer:
+            self._schedule_timer.cancel()
+            self._schedule_timer = None
+        checks = list(self._running_checks.values())
+        for task in checks:
             task.cancel()
+        await asyncio.gather(*checks, return_exceptions=True)
+        self._running_checks.clear()
         
-        # 取消警报处理任务
-        self.alert_task.cancel()
-        
-        # 等待任务完成
-        await asyncio.gather(*self.monitoring_tasks.values(), return_exceptions=True)
-        await asyncio.gather(self.alert_task, return_exceptions=True)
+        # 取消监控主任务（警报处理任务随之取消）并等待结束
+        if self._monitoring_task:
+            self._monitoring_task.cancel()
+            await asyncio.gather(self._monitoring_task, return_exceptions=True)
+            self._monitoring_task = None
         
         logger.info("风险监控服务已停止")
     
-    async def _monitor_risk_type(self, risk_type: str, interval: int):
-        """监控特定风险类型"""
-        while self.is_running:
-            try:
-                await self._execute_risk_monitoring(risk_type)
-                await asyncio.sleep(interval)
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"{risk_type}监控失败: {str(e)}")
-                await asyncio.sleep(interval)
+    async def _run_monitoring(self):
+        """以任务组运行警报处理和定时触发的监控（Python 3.11+ 使用asyncio.TaskGroup）
+        
+        Python 3.12+ 的监控检查以eager方式单独创建（只作用于本监控的任务，
+        不修改事件循环共享的任务工厂），由stop_monitoring负责取消。
+        """
+        loop = asyncio.get_running_loop()
+        task_group = getattr(asyncio, "TaskGroup", None)
+        if task_group is None:
+            self._spawn = loop.create_task
+            self._arm_schedule()
+            await self._process_alerts()
+            return
+        async with task_group() as group:
+            if _EAGER_TASKS:
+                self._spawn = functools.partial(asyncio.Task, loop=loop, eager_start=True)
+            else:
+                self._spawn = group.create_task
+            self._arm_schedule()
+            group.create_task(self._process_alerts())
+    
+    def _arm_schedule(self):
+        """为最近的到期时间预约定时器（不占用挂起的任务）"""
+        if self._schedule and self.is_running:
+            self._schedule_timer = asyncio.get_running_loop().call_at(
+                self._schedule[0][0], self._on_schedule_timer
+            )
+    
+    def _on_schedule_timer(self):
+        """定时器回调：启动所有已到期的监控并预约下一次"""
+        self._schedule_timer = None
+        if not self.is_running:
+            return
+        
+        schedule = self._schedule
+        now = asyncio.get_running_loop().time()
+        while schedule[0][0] <= now:
+            due, risk_type, interval = schedule[0]
+            
+            # 预约下一次执行；落后超过一个周期时从当前时间重新计算
+            next_due = due + interval
+            if next_due <= now:
+                next_due = now + interval
+            heapq.heapreplace(schedule, (next_due, risk_type, interval))
+            
+            # 上次执行尚未结束时跳过本次
+            running = self._running_checks.get(risk_type)
+            if running is not None and not running.done():
+                logger.warning(f"{risk_type}监控上次执行未结束，跳过本次")
+                continue
+            self._running_checks[risk_type] = self._spawn(self._run_check(risk_type))
+        
+        self._arm_schedule()
+    
+    async def _run_check(self, risk_type: str):
+        """执行一次监控，异常只记录不影响其他监控"""
+        try:
+            await self._execute_risk_monitoring(risk_type)
+        except Exception as e:
+            logger.error(f"{risk_type}监控失败: {str(e)}")
     
     async def _execute_risk_monitoring(self, risk_type: str):
         """执行风险监控"""
-        timestamp = datetime.now()
+        timestamp = _now()
+        history = self.monitoring_history[risk_type]
         
         try:
             if risk_type == "position_risk":
@@ -121,17 +333,13 @@ class RiskMonitor:
                 await self._monitor_portfolio_risk()
             
             # 记录监控历史
-            self.monitoring_history[risk_type].append({
+            history.append({
                 "timestamp": timestamp,
                 "status": "success"
             })
-            
-            # 清理历史记录
-            if len(self.monitoring_history[risk_type]) > 1000:
-                self.monitoring_history[risk_type] = self.monitoring_history[risk_type][-1000:]
                 
         except Exception as e:
-            self.monitoring_history[risk_type].append({
+            history.append({
                 "timestamp": timestamp,
                 "status": "error",
                 "error": str(e)
@@ -143,16 +351,26 @@ class RiskMonitor:
         # 获取当前仓位数据
         portfolio = await self._get_current_portfolio()
         
-        for symbol, position in portfolio.items():
-            # 检查单个仓位风险
-            risk_check = await self.risk_engine.check_trade_risk(
-                symbol=symbol,
-                side="hold",
-                quantity=0,
-                order_type="monitor"
-            )
+        # 并发检查所有仓位风险
+        risk_checks = await asyncio.gather(
+            *(
+                self.risk_engine.check_trade_risk(
+                    symbol=symbol,
+                    side="hold",
+                    quantity=0,
+                    order_type="monitor"
+                )
+                for symbol in portfolio
+            ),
+            return_exceptions=True
+        )
+        
+        for (symbol, position), risk_check in zip(portfolio.items(), risk_checks):
+            if isinstance(risk_check, Exception):
+                logger.error(f"检查 {symbol} 仓位风险失败: {str(risk_check)}")
+                continue
             
-            if risk_check["risk_level"] in ["high", "critical"]:
+            if risk_check["risk_level"] in HIGH_SEVERITIES:
                 await self._trigger_risk_event(
                     RiskType.MARKET,
                     RiskLevel(risk_check["risk_level"]),
@@ -167,105 +385,161 @@ class RiskMonitor:
         # 获取市场数据
         market_data = await self._get_market_data()
         
-        for symbol, data in market_data.items():
-            volatility = data.get("volatility", 0)
-            
-            # 检查市场波动率
-            if volatility > 0.1:  # 10%波动率阈值
-                await self._trigger_risk_event(
-                    RiskType.MARKET,
-                    RiskLevel.HIGH if volatility > 0.2 else RiskLevel.MEDIUM,
-                    symbol,
-                    f"市场波动率过高: {volatility:.2%}",
-                    volatility,
-                    0.1
-                )
+        # 检查市场波动率：一次查表得到所有交易对的风险等级
+        hits, level_index = _classify(market_data.volatility, MARKET_VOLATILITY_THRESHOLDS,
+                                      MARKET_VOLATILITY_LEVELS, side="left")
+        for i in hits:
+            volatility = float(market_data.volatility[i])
+            await self._trigger_risk_event(
+                RiskType.MARKET,
+                MARKET_VOLATILITY_LEVELS[level_index[i]],
+                market_data.symbols[i],
+                f"市场波动率过高: {volatility:.2%}",
+                volatility,
+                float(MARKET_VOLATILITY_THRESHOLDS[0])
+            )
     
     async def _monitor_liquidity_risk(self):
         """监控流动性风险"""
         # 获取流动性数据
         liquidity_data = await self._get_liquidity_data()
         
-        for symbol, data in liquidity_data.items():
-            liquidity_score = data.get("liquidity_score", 1.0)
-            
-            # 检查流动性风险
-            if liquidity_score < 0.5:  # 流动性评分阈值
-                await self._trigger_risk_event(
-                    RiskType.LIQUIDITY,
-                    RiskLevel.HIGH if liquidity_score < 0.3 else RiskLevel.MEDIUM,
-                    symbol,
-                    f"流动性风险: 评分 {liquidity_score:.2f}",
-                    liquidity_score,
-                    0.5
-                )
+        # 检查流动性风险：一次查表得到所有交易对的风险等级
+        hits, level_index = _classify(liquidity_data.liquidity_score, LIQUIDITY_SCORE_THRESHOLDS,
+                                      LIQUIDITY_SCORE_LEVELS, side="right")
+        for i in hits:
+            liquidity_score = float(liquidity_data.liquidity_score[i])
+            await self._trigger_risk_event(
+                RiskType.LIQUIDITY,
+                LIQUIDITY_SCORE_LEVELS[level_index[i]],
+                liquidity_data.symbols[i],
+                f"流动性风险: 评分 {liquidity_score:.2f}",
+                liquidity_score,
+                float(LIQUIDITY_SCORE_THRESHOLDS[-1])
+            )
     
     async def _monitor_portfolio_risk(self):
         """监控投资组合风险"""
         portfolio = await self._get_current_portfolio()
         
         if portfolio:
-            # 计算组合风险指标
-            risk_metrics = await self.risk_engine.monitor_portfolio_risk(portfolio)
+            # 计算组合风险指标（滚动协方差样本足够时按协方差计算VaR）
+            covariance = await self._update_rolling_covariance(portfolio)
+            risk_metrics = await self.risk_engine.monitor_portfolio_risk(portfolio, covariance)
             
             # 检查VaR阈值
-            if risk_metrics.get("var_95", 0) > 1000:  # 示例阈值
+            var_95 = risk_metrics.get("var_95", 0)
+            level = _level_of(var_95, PORTFOLIO_VAR_THRESHOLDS, PORTFOLIO_VAR_LEVELS, side="left")
+            if level is not None:
                 await self._trigger_risk_event(
                     RiskType.MARKET,
-                    RiskLevel.HIGH,
+                    level,
                     "PORTFOLIO",
-                    f"投资组合VaR超过阈值: {risk_metrics['var_95']:.2f}",
-                    risk_metrics["var_95"],
-                    1000
+                    f"投资组合VaR超过阈值: {var_95:.2f}",
+                    var_95,
+                    float(PORTFOLIO_VAR_THRESHOLDS[0])
                 )
             
             # 检查集中度风险
-            if risk_metrics.get("concentration_risk", 0) > 0.3:  # 30%集中度阈值
+            concentration = risk_metrics.get("concentration_risk", 0)
+            level = _level_of(concentration, CONCENTRATION_THRESHOLDS, CONCENTRATION_LEVELS, side="left")
+            if level is not None:
                 await self._trigger_risk_event(
                     RiskType.MARKET,
-                    RiskLevel.MEDIUM,
+                    level,
                     "PORTFOLIO",
-                    f"投资组合集中度过高: {risk_metrics['concentration_risk']:.2%}",
-                    risk_metrics["concentration_risk"],
-                    0.3
+                    f"投资组合集中度过高: {concentration:.2%}",
+                    concentration,
+                    float(CONCENTRATION_THRESHOLDS[0])
                 )
     
+    async def _update_rolling_covariance(self, portfolio: Dict) -> Optional[np.ndarray]:
+        """用最新价格更新持仓交易对的滚动协方差，返回可用的协方差矩阵
+        
+        收益率按组合监控间隔采样，返回前按平方根法则换算到VAR_HORIZON_SECONDS期限，
+        使参数法VaR与历史模拟法VaR的期限一致，可以使用同一组阈值。
+        价格缺失或非正时跳过本次采样，也不作为下次计算收益率的基准。
+        """
+        symbols = tuple(portfolio)
+        market_data = await self._get_market_data()
+        rows = {symbol: i for i, symbol in enumerate(market_data.symbols)}
+        if any(symbol not in rows for symbol in symbols):
+            return None
+        prices = market_data.price[[rows[symbol] for symbol in symbols]]
+        
+        # 持仓交易对变化时重新开始累积
+        if symbols != self._rolling_symbols:
+            lookback = self.monitoring_config["portfolio_risk"].get("lookback", 100)
+            self._rolling = _RollingCovariance(len(symbols), lookback)
+            self._rolling_symbols = symbols
+            self._last_prices = None
+        
+        if np.isfinite(prices).all() and (prices > 0).all():
+            if self._last_prices is not None:
+                self._rolling.update(prices / self._last_prices - 1.0)
+            self._last_prices = prices
+        else:
+            logger.warning(f"持仓交易对价格无效，跳过本次协方差采样: {dict(zip(symbols, prices.tolist()))}")
+        
+        if self._rolling.count < MIN_COVARIANCE_PERIODS:
+            return None
+        interval = self.monitoring_config["portfolio_risk"]["interval"]
+        return self._rolling.cov * (VAR_HORIZON_SECONDS / interval)
+    
     async def _process_alerts(self):
         """处理风险警报"""
+        queue = self.alert_queue
         while self.is_running:
             try:
-                # 检查风险引擎中的警报
-                active_alerts = self.risk_engine.active_alerts
-                
-                for alert in active_alerts:
-                    # 处理高风险警报
-                    if alert.level in ["high", "critical"]:
-                        await self._handle_high_risk_alert(alert)
+                # 等待新警报，再取出队列中已积压的警报一并处理
+                alerts = [await queue.get()]
+                while not queue.empty():
+                    alerts.append(queue.get_nowait())
                 
-                await asyncio.sleep(10)  # 每10秒检查一次
+                # 并发处理高风险警报（入队时已过滤）；紧急警报的处理不随监控停止而中断
+                results = await asyncio.gather(
+                    *(
+                        asyncio.shield(self._handle_high_risk_alert(alert))
+                        if alert.severity == "critical"
+                        else self._handle_high_risk_alert(alert)
+                        for alert in alerts
+                    ),
+                    return_exceptions=True
+                )
+                for alert, result in zip(alerts, results):
+                    if isinstance(result, Exception):
+                        logger.error(f"处理警报失败: {alert.message} - {str(result)}")
                 
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"警报处理失败: {str(e)}")
-                await asyncio.sleep(10)
     
-    async def _handle_high_risk_alert(self, alert: RiskAlert):
+    def _on_engine_alert(self, alert: "RiskAlert"):
+        """风险引擎警报回调：只将高风险警报放入待处理队列"""
+        if alert.severity not in HIGH_SEVERITIES:
+            return
+        try:
+            self.alert_queue.put_nowait(alert)
+        except asyncio.QueueFull:
+            logger.error(f"警报队列已满，丢弃警报: {alert.message}")
+    
+    async def _handle_high_risk_alert(self, alert: "RiskAlert"):
         """处理高风险警报"""
         logger.warning(f"处理高风险警报: {alert.message}")
         
         # 根据警报级别采取相应措施
-        if alert.level == "critical":
+        if alert.severity == "critical":
             # 紧急措施：停止交易
             await self._execute_emergency_action("stop_trading", alert)
-        elif alert.level == "high":
+        elif alert.severity == "high":
             # 高风险措施：减仓
             await self._execute_risk_action("reduce_position", alert)
         
         # 通知订阅者
         await self._notify_subscribers(alert)
     
-    async def _execute_emergency_action(self, action: str, alert: RiskAlert):
+    async def _execute_emergency_action(self, action: str, alert: "RiskAlert"):
         """执行紧急措施"""
         logger.critical(f"执行紧急措施: {action} - {alert.message}")
         
@@ -276,7 +550,7 @@ class RiskMonitor:
             # 紧急平仓
             await self._liquidate_positions()
     
-    async def _execute_risk_action(self, action: str, alert: RiskAlert):
+    async def _execute_risk_action(self, action: str, alert: "RiskAlert"):
         """执行风险控制措施"""
         logger.warning(f"执行风险控制: {action} - {alert.message}")
         
@@ -298,45 +572,49 @@ class RiskMonitor:
     ):
         """触发风险事件"""
         event = RiskEvent(
-            event_id=f"risk_{int(time.time())}",
-            timestamp=datetime.now(),
+            event_id=f"risk_{next(_event_counter)}",
+            timestamp=_now(),
             risk_level=risk_level,
             risk_type=risk_type,
-            symbol=symbol,
+            symbol=sys.intern(symbol),  # 交易对名称重复度高，驻留后所有事件共享同一字符串
             message=message,
             value=value,
             threshold=threshold
         )
         
+        # 超出HISTORY_SIZE时自动丢弃最旧的事件
         self.risk_events.append(event)
         
-        # 限制事件数量
-        if len(self.risk_events) > 1000:
-            self.risk_events = self.risk_events[-1000:]
-        
         logger.info(f"风险事件: {risk_level.value} - {message}")
     
     async def subscribe(self, callback: Callable):
         """订阅风险事件"""
         self.subscribers.append(callback)
     
-    async def _notify_subscribers(self, alert: RiskAlert):
-        """通知订阅者"""
-        for callback in self.subscribers:
+    async def _notify_subscribers(self, alert: "RiskAlert"):
+        """通知订阅者（并发执行，慢订阅者不阻塞其他订阅者）"""
+        if self.subscribers:
+            await asyncio.gather(*(self._notify_one(callback, alert) for callback in self.subscribers))
+    
+    async def _notify_one(self, callback: Callable, alert: "RiskAlert"):
+        """在并发上限内执行单个订阅者回调"""
+        async with self._notify_semaphore:
             try:
-                await callback(alert)
+                result = callback(alert)
+                if asyncio.iscoroutine(result):
+                    await result
             except Exception as e:
                 logger.error(f"通知订阅者失败: {str(e)}")
     
     async def get_monitoring_status(self) -> Dict:
-        """获取监控状态"""
-        return {
-            "is_running": self.is_running,
-            "monitoring_tasks": len(self.monitoring_tasks),
-            "active_alerts": len(self.risk_engine.active_alerts),
-            "risk_events": len(self.risk_events),
-            "subscribers": len(self.subscribers)
-        }
+        """获取监控状态（返回的字典由监控器复用，调用方不应修改）"""
+        status = self._status
+        status["is_running"] = self.is_running
+        status["monitoring_tasks"] = len(self.monitoring_tasks)
+        status["active_alerts"] = self.risk_engine.count_active_alerts()
+        status["risk_events"] = len(self.risk_events)
+        status["subscribers"] = len(self.subscribers)
+        return status
     
     async def get_risk_summary(self) -> Dict:
         """获取风险摘要"""
@@ -344,49 +622,91 @@ class RiskMonitor:
         
         if portfolio:
             risk_metrics = await self.risk_engine.monitor_portfolio_risk(portfolio)
-            risk_report = await self.risk_engine.get_risk_report(portfolio)
             
             return {
                 "portfolio_value": sum(portfolio.values()),
                 "risk_metrics": risk_metrics,
                 "active_alerts": [
                     {
-                        "level": alert.level,
-                        "type": alert.type,
+                        "level": alert.severity,
+                        "type": alert.risk_type,
                         "symbol": alert.symbol,
                         "message": alert.message,
                         "timestamp": alert.timestamp.isoformat()
                     }
-                    for alert in self.risk_engine.active_alerts[:10]  # 最近10个警报
+                    for alert in self.risk_engine.get_active_alerts(limit=10)  # 最近10个警报
                 ],
                 "monitoring_status": await self.get_monitoring_status()
             }
         
         return {"error": "无法获取投资组合数据"}
     
-    # 以下方法需要根据实际系统实现
+    def _data_cache_ttl(self) -> float:
+        """数据缓存有效期：取已启用监控的最短间隔"""
+        return min(
+            (config["interval"] for config in self.monitoring_config.values() if config["enabled"]),
+            default=30
+        )
+    
+    async def _cached(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """在有效期内复用已获取的数据，过期后同一key只有一个协程重新获取"""
+        ttl = self._data_cache_ttl()
+        entry = self._data_cache.get(key)
+        if entry is not None and _monotonic() - entry[0] < ttl:
+            return entry[1]
+        
+        lock = self._data_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # 等待锁期间其他协程可能已经刷新
+            entry = self._data_cache.get(key)
+            if entry is not None and _monotonic() - entry[0] < ttl:
+                return entry[1]
+            
+            data = await fetch()
+            self._data_cache[key] = (_monotonic(), data)
+            return data
+    
     async def _get_current_portfolio(self) -> Dict:
+        """获取当前投资组合（带缓存）"""
+        previous = self._data_cache.get("portfolio")
+        portfolio = await self._cached("portfolio", self._fetch_current_portfolio)
+        
+        # 持仓交易对变化时市场、流动性数据随之失效
+        if previous is not None and previous[1].keys() != portfolio.keys():
+            self._data_cache.pop("market", None)
+            self._data_cache.pop("liquidity", None)
+        return portfolio
+    
+    async def _get_market_data(self) -> MarketSnapshot:
+        """获取市场数据（带缓存）"""
+        return await self._cached("market", self._fetch_market_data)
+    
+    async def _get_liquidity_data(self) -> LiquiditySnapshot:
+        """获取流动性数据（带缓存）"""
+        return await self._cached("liquidity", self._fetch_liquidity_data)
+    
+    # 以下方法需要根据实际系统实现
+    async def _fetch_current_portfolio(self) -> Dict:
         """获取当前投资组合"""
         # 这里应该从数据库或交易系统获取真实数据
         return {"BTCUSDT": 5000, "ETHUSDT": 3000, "BNBUSDT": 2000}
     
-    async def _get_market_data(self) -> Dict:
+    async def _fetch_market_data(self) -> MarketSnapshot:
         """获取市场数据"""
         # 这里应该从交易所API获取真实数据
-        return {
-            "BTCUSDT": {"volatility": 0.05, "price": 50000},
-            "ETHUSDT": {"volatility": 0.08, "price": 3000},
-            "BNBUSDT": {"volatility": 0.12, "price": 400}
-        }
+        return MarketSnapshot(
+            symbols=("BTCUSDT", "ETHUSDT", "BNBUSDT"),
+            volatility=np.array([0.05, 0.08, 0.12]),
+            price=np.array([50000.0, 3000.0, 400.0])
+        )
     
-    async def _get_liquidity_data(self) -> Dict:
+    async def _fetch_liquidity_data(self) -> LiquiditySnapshot:
         """获取流动性数据"""
         # 这里应该从交易所API获取真实数据
-        return {
-            "BTCUSDT": {"liquidity_score": 0.9},
-            "ETHUSDT": {"liquidity_score": 0.8},
-            "BNBUSDT": {"liquidity_score": 0.7}
-        }
+        return LiquiditySnapshot(
+            symbols=("BTCUSDT", "ETHUSDT", "BNBUSDT"),
+            liquidity_score=np.array([0.9, 0.8, 0.7])
+        )
     
     async def _stop_all_trading(self):
         """停止所有交易"""
@@ -415,6 +735,9 @@ async def get_risk_monitor() -> RiskMonitor:
     """获取风险监控器实例"""
     global risk_monitor
     if risk_monitor is None:
+        from risk_management.risk_engine import RiskEngine
+        from strategies.backtesting import BacktestManager
+        
         risk_engine = RiskEngine()
         backtest_manager = BacktestManager()
         risk_monitor = RiskMonitor(risk_engine, backtest_manager)
@@ -3,19 +3,112 @@
 生成详细的风险分析报告
 """
 
-import pandas as pd
 import numpy as np
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 import json
 import logging
+import math
+import string
+from collections import Counter
+from heapq import nlargest
+from operator import attrgetter
 from pathlib import Path
-import matplotlib.pyplot as plt
-import seaborn as sns
+from ._risk_kernels import concentration, risk_score
 from .risk_engine import RiskMetrics, RiskAlert
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# 年化波动率换算为日波动率的系数（每年252个交易日）
+DAILY_VOLATILITY_FACTOR = 1.0 / math.sqrt(252)
+
+# 风险评分表：每行为一项指标的升序阈值，指标每超过一个阈值加1分
+# 依次为 VaR(95%)、最大回撤、-夏普比率（夏普比率越低风险越高）、年化波动率
+RISK_SCORE_THRESHOLDS = np.array([
+    [0.01, 0.03, 0.05],
+    [0.1, 0.15, 0.2],
+    [-1.5, -1.0, -0.5],
+    [0.2, 0.3, 0.4],
+])
+# 风险等级：总分达到对应下限即进入该等级
+RISK_LEVEL_SCORES = np.array([2, 4, 7, 9])
+RISK_LEVELS = ('Very Low', 'Low', 'Medium', 'High', 'Extreme')
+
+# 仪表板中警报级别的中文名称和建议优先级的图标
+SEVERITY_NAMES_CN = {
+    'critical': '严重',
+    'high': '高',
+    'medium': '中等',
+    'low': '低'
+}
+PRIORITY_EMOJIS = {
+    'critical': '🔴',
+    'high': '🟠',
+    'medium': '🟡',
+    'low': '🟢'
+}
+
+# 摘要仪表板HTML模板（模块加载时创建一次；CSS中的花括号无需转义）
+DASHBOARD_TEMPLATE = string.Template("""
+<!DOCTYPE html>
+<html>
+<head>
+    <title>风险管理仪表板</title>
+    <meta charset="utf-8">
+    <style>
+        body { font-family: Arial, sans-serif; margin: 20px; background-color: #f5f5f5; }
+        .container { max-width: 1200px; margin: 0 auto; }
+        .header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 20px; border-radius: 10px; margin-bottom: 20px; }
+        .card { background: white; padding: 20px; margin: 10px 0; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }
+        .metric { display: inline-block; margin: 10px 20px; text-align: center; }
+        .metric-value { font-size: 2em; font-weight: bold; color: #333; }
+        .metric-label { color: #666; margin-top: 5px; }
+        .alert { padding: 10px; margin: 5px 0; border-radius: 5px; }
+        .critical { background-color: #ffebee; color: #c62828; border-left: 4px solid #c62828; }
+        .high { background-color: #fff3e0; color: #ef6c00; border-left: 4px solid #ef6c00; }
+        .medium { background-color: #fff8e1; color: #f9a825; border-left: 4px solid #f9a825; }
+        .low { background-color: #e8f5e8; color: #2e7d32; border-left: 4px solid #2e7d32; }
+        .recommendation { background-color: #e3f2fd; padding: 15px; border-radius: 5px; margin: 10px 0; }
+        .status-compliant { color: #4caf50; font-weight: bold; }
+        .status-non-compliant { color: #f44336; font-weight: bold; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>🛡️ AI量化交易系统 - 风险管理仪表板</h1>
+            <p>报告生成时间: $report_time</p>
+        </div>
+        
+        <div class="card">
+            <h2>📊 核心风险指标</h2>
+            $metrics_html
+        </div>
+        
+        <div class="card">
+            <h2>🚨 风险警报状态</h2>
+            $alerts_html
+        </div>
+        
+        <div class="card">
+            <h2>📋 合规性检查</h2>
+            $compliance_html
+        </div>
+        
+        <div class="card">
+            <h2>💡 风险管理建议</h2>
+            $recommendations_html
+        </div>
+    </div>
+</body>
+</html>
+""")
+
 
 class RiskReporter:
     """风险报告生成器"""
@@ -29,6 +122,9 @@ class RiskReporter:
                           portfolio_data: Dict[str, Any]) -> Dict[str, Any]:
         """生成完整风险报告"""
         try:
+            # 警报按严重程度计数一次，供各部分共用
+            severity_counts = Counter(alert.severity for alert in alerts)
+            
             report = {
                 'report_metadata': {
                     'generated_at': datetime.now().isoformat(),
@@ -36,10 +132,10 @@ class RiskReporter:
                     'period': '24h'
                 },
                 'risk_metrics': self._format_risk_metrics(risk_metrics),
-                'risk_alerts': self._format_alerts(alerts),
+                'risk_alerts': self._format_alerts(alerts, severity_counts),
                 'portfolio_analysis': self._analyze_portfolio(portfolio_data),
-                'risk_recommendations': self._generate_recommendations(risk_metrics, alerts),
-                'compliance_check': self._check_compliance(risk_metrics, alerts)
+                'risk_recommendations': self._generate_recommendations(risk_metrics, severity_counts),
+                'compliance_check': self._check_compliance(risk_metrics, severity_counts)
             }
             
             return report
@@ -70,39 +166,29 @@ class RiskReporter:
             },
             'volatility_metrics': {
                 'annual_volatility': f"{risk_metrics.volatility:.2%}",
-                'daily_volatility': f"{risk_metrics.volatility / np.sqrt(252):.2%}",
+                'daily_volatility': f"{risk_metrics.volatility * DAILY_VOLATILITY_FACTOR:.2%}",
                 'interpretation': '价格波动程度'
             },
             'risk_level': self._assess_risk_level(risk_metrics)
         }
     
-    def _format_alerts(self, alerts: List[RiskAlert]) -> Dict[str, Any]:
+    def _format_alerts(self, alerts: List[RiskAlert],
+                       severity_counts: Counter) -> Dict[str, Any]:
         """格式化风险警报"""
         if not alerts:
             return {'total': 0, 'by_severity': {}, 'recent': []}
         
-        # 按严重程度分类
-        alerts_by_severity = {}
-        for alert in alerts:
-            severity = alert.severity
-            if severity not in alerts_by_severity:
-                alerts_by_severity[severity] = []
-            alerts_by_severity[severity].append(alert)
-        
-        # 最近警报（按时间排序）
-        recent_alerts = sorted(alerts, key=lambda x: x.timestamp, reverse=True)[:10]
+        # 最近10个警报（部分选择，无需对全部警报排序）
+        recent_alerts = nlargest(10, alerts, key=attrgetter('timestamp'))
         
         return {
             'total': len(alerts),
-            'by_severity': {
-                severity: len(alerts_list) 
-                for severity, alerts_list in alerts_by_severity.items()
-            },
+            'by_severity': dict(severity_counts),
             'summary': {
-                'critical': len(alerts_by_severity.get('critical', [])),
-                'high': len(alerts_by_severity.get('high', [])),
-                'medium': len(alerts_by_severity.get('medium', [])),
-                'low': len(alerts_by_severity.get('low', []))
+                'critical': severity_counts['critical'],
+                'high': severity_counts['high'],
+                'medium': severity_counts['medium'],
+                'low': severity_counts['low']
             },
             'recent': [
                 {
@@ -123,22 +209,23 @@ class RiskReporter:
             return {'analysis': 'No portfolio data available'}
         
         try:
-            # 计算集中度
-            total_value = sum(data.get('value', 0) for data in portfolio_data.values())
+            # 计算集中度：持仓价值一次性读入数组，总价值、HHI和最大占比由计算内核一次得到
+            symbols = list(portfolio_data.keys())
+            values = np.fromiter(
+                (data.get('value', 0) for data in portfolio_data.values()),
+                dtype=np.float64,
+                count=len(symbols)
+            )
+            total_value, herfindahl_index, max_concentration = concentration(values)
+            total_value = float(total_value)
             
             if total_value > 0:
-                concentration = {}
-                for symbol, data in portfolio_data.items():
-                    value = data.get('value', 0)
-                    concentration[symbol] = value / total_value
-                
-                # 计算集中度指标
-                herfindahl_index = sum(weight ** 2 for weight in concentration.values())
-                max_concentration = max(concentration.values()) if concentration else 0
+                herfindahl_index = float(herfindahl_index)
+                max_concentration = float(max_concentration)
                 
                 return {
                     'total_value': total_value,
-                    'concentration': concentration,
+                    'concentration': dict(zip(symbols, (values / total_value).tolist())),
                     'risk_metrics': {
                         'herfindahl_index': herfindahl_index,
                         'max_concentration': max_concentration,
@@ -162,54 +249,20 @@ class RiskReporter:
         if not risk_metrics:
             return 'Unknown'
         
-        risk_score = 0
-        
-        # VaR评分
-        if risk_metrics.var_95 > 0.05:
-            risk_score += 3
-        elif risk_metrics.var_95 > 0.03:
-            risk_score += 2
-        elif risk_metrics.var_95 > 0.01:
-            risk_score += 1
-        
-        # 最大回撤评分
-        if risk_metrics.max_drawdown > 0.2:
-            risk_score += 3
-        elif risk_metrics.max_drawdown > 0.15:
-            risk_score += 2
-        elif risk_metrics.max_drawdown > 0.1:
-            risk_score += 1
-        
-        # 夏普比率评分（低夏普比率增加风险评分）
-        if risk_metrics.sharpe_ratio < 0.5:
-            risk_score += 3
-        elif risk_metrics.sharpe_ratio < 1.0:
-            risk_score += 2
-        elif risk_metrics.sharpe_ratio < 1.5:
-            risk_score += 1
-        
-        # 波动率评分
-        if risk_metrics.volatility > 0.4:
-            risk_score += 3
-        elif risk_metrics.volatility > 0.3:
-            risk_score += 2
-        elif risk_metrics.volatility > 0.2:
-            risk_score += 1
+        # 各项指标超过的阈值个数之和即风险评分
+        score = risk_score(
+            risk_metrics.var_95,
+            risk_metrics.max_drawdown,
+            risk_metrics.sharpe_ratio,
+            risk_metrics.volatility,
+            RISK_SCORE_THRESHOLDS
+        )
         
         # 确定风险等级
-        if risk_score >= 9:
-            return 'Extreme'
-        elif risk_score >= 7:
-            return 'High'
-        elif risk_score >= 4:
-            return 'Medium'
-        elif risk_score >= 2:
-            return 'Low'
-        else:
-            return 'Very Low'
+        return RISK_LEVELS[np.searchsorted(RISK_LEVEL_SCORES, score, side='right')]
     
     def _generate_recommendations(self, risk_metrics: RiskMetrics, 
-                               alerts: List[RiskAlert]) -> List[Dict[str, Any]]:
+                               severity_counts: Counter) -> List[Dict[str, Any]]:
         """生成风险建议"""
         recommendations = []
         
@@ -257,13 +310,13 @@ class RiskReporter:
                 })
             
             # 基于警报的建议
-            critical_alerts = [a for a in alerts if a.severity == 'critical']
-            if critical_alerts:
+            critical_count = severity_counts['critical']
+            if critical_count:
                 recommendations.append({
                     'type': 'alert_response',
                     'priority': 'critical',
                     'title': '立即处理关键风险警报',
-                    'description': f'有{len(critical_alerts)}个关键风险警报需要处理',
+                    'description': f'有{critical_count}个关键风险警报需要处理',
                     'actions': [
                         '立即评估警报原因',
                         '执行应急止损措施',
@@ -291,7 +344,7 @@ class RiskReporter:
         return recommendations
     
     def _check_compliance(self, risk_metrics: RiskMetrics, 
-                        alerts: List[RiskAlert]) -> Dict[str, Any]:
+                        severity_counts: Counter) -> Dict[str, Any]:
         """合规性检查"""
         compliance_status = {
             'overall': 'compliant',
@@ -300,51 +353,31 @@ class RiskReporter:
         }
         
         try:
-            # 检查VaR限制
-            if risk_metrics and risk_metrics.var_95 > 0.05:
-                compliance_status['violations'].append({
-                    'rule': 'VaR Limit',
-                    'limit': '5%',
-                    'actual': f'{risk_metrics.var_95:.2%}',
-                    'status': 'exceeded'
-                })
-                compliance_status['overall'] = 'non_compliant'
-            else:
-                compliance_status['checks'].append({
-                    'rule': 'VaR Limit',
-                    'status': 'passed'
-                })
+            # 合规规则表：(规则名称, 限制说明, 实际值, 限制值, 实际值格式)
+            rules = (
+                ('VaR Limit', '5%', risk_metrics.var_95 if risk_metrics else 0.0, 0.05, '{:.2%}'),
+                ('Max Drawdown Limit', '20%', risk_metrics.max_drawdown if risk_metrics else 0.0, 0.2, '{:.2%}'),
+                ('Critical Alert Limit', '0', severity_counts['critical'], 0, '{}')
+            )
             
-            # 检查最大回撤限制
-            if risk_metrics and risk_metrics.max_drawdown > 0.2:
-                compliance_status['violations'].append({
-                    'rule': 'Max Drawdown Limit',
-                    'limit': '20%',
-                    'actual': f'{risk_metrics.max_drawdown:.2%}',
-                    'status': 'exceeded'
-                })
-                compliance_status['overall'] = 'non_compliant'
-            else:
-                compliance_status['checks'].append({
-                    'rule': 'Max Drawdown Limit',
-                    'status': 'passed'
-                })
+            violations = compliance_status['violations']
+            checks = compliance_status['checks']
+            for rule, limit_text, actual, limit, actual_format in rules:
+                if actual > limit:
+                    violations.append({
+                        'rule': rule,
+                        'limit': limit_text,
+                        'actual': actual_format.format(actual),
+                        'status': 'exceeded'
+                    })
+                else:
+                    checks.append({
+                        'rule': rule,
+                        'status': 'passed'
+                    })
             
-            # 检查关键警报数量
-            critical_alerts = [a for a in alerts if a.severity == 'critical']
-            if len(critical_alerts) > 0:
-                compliance_status['violations'].append({
-                    'rule': 'Critical Alert Limit',
-                    'limit': '0',
-                    'actual': f'{len(critical_alerts)}',
-                    'status': 'exceeded'
-                })
+            if violations:
                 compliance_status['overall'] = 'non_compliant'
-            else:
-                compliance_status['checks'].append({
-                    'rule': 'Critical Alert Limit',
-                    'status': 'passed'
-                })
             
         except Exception as e:
             logger.error(f"合规性检查失败: {e}")
@@ -360,8 +393,13 @@ class RiskReporter:
             
             filepath = self.output_dir / filename
             
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(report, f, ensure_ascii=False, indent=2)
+            # 优先使用orjson一次性编码为UTF-8字节，未安装时回退到标准库json
+            if orjson is not None:
+                with open(filepath, 'wb') as f:
+                    f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+            else:
+                with open(filepath, 'w', encoding='utf-8') as f:
+                    json.dump(report, f, ensure_ascii=False, indent=2)
             
             logger.info(f"风险报告已保存: {filepath}")
             return str(filepath)
@@ -372,62 +410,12 @@ class RiskReporter:
     
     def generate_summary_dashboard(self, report: Dict[str, Any]) -> str:
         """生成摘要仪表板HTML"""
-        try:
-            html_template = """
-<!DOCTYPE html>
-<html>
-<head>
-    <title>风险管理仪表板</title>
-    <meta charset="utf-8">
-    <style>
-        body { font-family: Arial, sans-serif; margin: 20px; background-color: #f5f5f5; }
-        .container { max-width: 1200px; margin: 0 auto; }
-        .header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 20px; border-radius: 10px; margin-bottom: 20px; }
-        .card { background: white; padding: 20px; margin: 10px 0; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }
-        .metric { display: inline-block; margin: 10px 20px; text-align: center; }
-        .metric-value { font-size: 2em; font-weight: bold; color: #333; }
-        .metric-label { color: #666; margin-top: 5px; }
-        .alert { padding: 10px; margin: 5px 0; border-radius: 5px; }
-        .critical { background-color: #ffebee; color: #c62828; border-left: 4px solid #c62828; }
-        .high { background-color: #fff3e0; color: #ef6c00; border-left: 4px solid #ef6c00; }
-        .medium { background-color: #fff8e1; color: #f9a825; border-left: 4px solid #f9a825; }
-        .low { background-color: #e8f5e8; color: #2e7d32; border-left: 4px solid #2e7d32; }
-        .recommendation { background-color: #e3f2fd; padding: 15px; border-radius: 5px; margin: 10px 0; }
-        .status-compliant { color: #4caf50; font-weight: bold; }
-        .status-non-compliant { color: #f44336; font-weight: bold; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🛡️ AI量化交易系统 - 风险管理仪表板</h1>
-            <p>报告生成时间: {report_time}</p>
-        </div>
-        
-        <div class="card">
-            <h2>📊 核心风险指标</h2>
-            {metrics_html}
-        </div>
-        
-        <div class="card">
-            <h2>🚨 风险警报状态</h2>
-            {alerts_html}
-        </div>
-        
-        <div class="card">
-            <h2>📋 合规性检查</h2>
-            {compliance_html}
-        </div>
+        # 报告生成失败时返回空报告，无需生成和保存仪表板
+        if not report:
+            logger.debug("风险报告为空，跳过仪表板生成")
+            return ""
         
-        <div class="card">
-            <h2>💡 风险管理建议</h2>
-            {recommendations_html}
-        </div>
-    </div>
-</body>
-</html>
-            """
-            
+        try:
             # 生成指标HTML
             metrics_html = self._generate_metrics_html(report.get('risk_metrics', {}))
             
@@ -441,7 +429,7 @@ class RiskReporter:
             recommendations_html = self._generate_recommendations_html(report.get('risk_recommendations', []))
             
             # 填充模板
-            html_content = html_template.format(
+            html_content = DASHBOARD_TEMPLATE.substitute(
                 report_time=report.get('report_metadata', {}).get('generated_at', 'N/A'),
                 metrics_html=metrics_html,
                 alerts_html=alerts_html,
@@ -469,11 +457,11 @@ class RiskReporter:
         if not risk_metrics:
             return "<p>暂无风险指标数据</p>"
         
-        html = "<div style='display: flex; flex-wrap: wrap; justify-content: space-around;'>"
+        parts = ["<div style='display: flex; flex-wrap: wrap; justify-content: space-around;'>"]
         
         # VaR指标
         var_data = risk_metrics.get('value_at_risk', {})
-        html += f"""
+        parts.append(f"""
         <div class="metric">
             <div class="metric-value">{var_data.get('var_95', 'N/A')}</div>
             <div class="metric-label">95% VaR</div>
@@ -482,20 +470,20 @@ class RiskReporter:
             <div class="metric-value">{var_data.get('var_99', 'N/A')}</div>
             <div class="metric-label">99% VaR</div>
         </div>
-        """
+        """)
         
         # 回撤指标
         drawdown_data = risk_metrics.get('drawdown_metrics', {})
-        html += f"""
+        parts.append(f"""
         <div class="metric">
             <div class="metric-value">{drawdown_data.get('max_drawdown', 'N/A')}</div>
             <div class="metric-label">最大回撤</div>
         </div>
-        """
+        """)
         
         # 性能指标
         perf_data = risk_metrics.get('performance_metrics', {})
-        html += f"""
+        parts.append(f"""
         <div class="metric">
             <div class="metric-value">{perf_data.get('sharpe_ratio', 'N/A')}</div>
             <div class="metric-label">夏普比率</div>
@@ -504,11 +492,11 @@ class RiskReporter:
             <div class="metric-value">{perf_data.get('sortino_ratio', 'N/A')}</div>
             <div class="metric-label">索提诺比率</div>
         </div>
-        """
+        """)
         
         # 波动率指标
         vol_data = risk_metrics.get('volatility_metrics', {})
-        html += f"""
+        parts.append(f"""
         <div class="metric">
             <div class="metric-value">{vol_data.get('annual_volatility', 'N/A')}</div>
             <div class="metric-label">年化波动率</div>
@@ -517,36 +505,31 @@ class RiskReporter:
             <div class="metric-value" style="color: {'red' if risk_metrics.get('risk_level') in ['High', 'Extreme'] else 'green'};">{risk_metrics.get('risk_level', 'N/A')}</div>
             <div class="metric-label">风险等级</div>
         </div>
-        """
+        """)
         
-        html += "</div>"
-        return html
+        parts.append("</div>")
+        return "".join(parts)
     
     def _generate_alerts_html(self, alerts_data: Dict[str, Any]) -> str:
         """生成警报HTML"""
         summary = alerts_data.get('summary', {})
         total = alerts_data.get('total', 0)
         
-        html = f"<p>警报总数: <strong>{total}</strong></p>"
+        parts = [f"<p>警报总数: <strong>{total}</strong></p>"]
         
         if summary:
-            html += "<div style='margin: 10px 0;'>"
+            parts.append("<div style='margin: 10px 0;'>")
             for severity, count in summary.items():
-                severity_cn = {
-                    'critical': '严重',
-                    'high': '高',
-                    'medium': '中等',
-                    'low': '低'
-                }.get(severity, severity)
+                severity_cn = SEVERITY_NAMES_CN.get(severity, severity)
                 
-                html += f"""
+                parts.append(f"""
                 <div class="alert {severity}">
                     {severity_cn}: {count} 个
                 </div>
-                """
-            html += "</div>"
+                """)
+            parts.append("</div>")
         
-        return html
+        return "".join(parts)
     
     def _generate_compliance_html(self, compliance_data: Dict[str, Any]) -> str:
         """生成就规性HTML"""
@@ -554,55 +537,49 @@ class RiskReporter:
         status_class = 'status-compliant' if overall_status == 'compliant' else 'status-non-compliant'
         status_text = '合规' if overall_status == 'compliant' else '不合规'
         
-        html = f"""
+        parts = [f"""
         <p>整体合规状态: <span class="{status_class}">{status_text}</span></p>
-        """
+        """]
         
         violations = compliance_data.get('violations', [])
         if violations:
-            html += "<h4>合规违规:</h4>"
+            parts.append("<h4>合规违规:</h4>")
             for violation in violations:
-                html += f"""
+                parts.append(f"""
                 <div class="alert high">
                     <strong>{violation.get('rule', 'N/A')}</strong>: 
                     实际值 {violation.get('actual', 'N/A')} 超过限制 {violation.get('limit', 'N/A')}
                 </div>
-                """
+                """)
         else:
-            html += "<p style='color: green;'>✅ 所有合规检查通过</p>"
+            parts.append("<p style='color: green;'>✅ 所有合规检查通过</p>")
         
-        return html
+        return "".join(parts)
     
     def _generate_recommendations_html(self, recommendations: List[Dict[str, Any]]) -> str:
         """生成建议HTML"""
         if not recommendations:
             return "<p>暂无特别建议</p>"
         
-        html = ""
+        parts = []
         for i, rec in enumerate(recommendations, 1):
-            priority_emoji = {
-                'critical': '🔴',
-                'high': '🟠', 
-                'medium': '🟡',
-                'low': '🟢'
-            }.get(rec.get('priority', 'low'), '⚪')
+            priority_emoji = PRIORITY_EMOJIS.get(rec.get('priority', 'low'), '⚪')
             
-            html += f"""
+            parts.append(f"""
             <div class="recommendation">
                 <h4>{priority_emoji} {rec.get('title', f'建议 {i}')}</h4>
                 <p>{rec.get('description', '')}</p>
                 <ul>
-            """
+            """)
             
-            for action in rec.get('actions', []):
-                html += f"<li>{action}</li>"
+            parts.extend(f"<li>{action}</li>" for action in rec.get('actions', []))
             
-            html += """
+            parts.append("""
                 </ul>
             </div>
-            """
+            """)
         
-        return html
+        return "".join(parts)
 
 
 # 使用示例
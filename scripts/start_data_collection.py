@@ -76,7 +76,7 @@ class DataCollectionService:
         logger.info("启动系统监控...")
         
         try:
-            await self.monitor.start()
+            self.monitor.start()
             logger.info("系统监控已启动")
         except Exception as e:
             logger.error(f"启动系统监控失败: {e}")
@@ -125,7 +125,7 @@ class DataCollectionService:
         
         # 停止监控
         try:
-            await self.monitor.stop()
+            self.monitor.stop()
             logger.info("系统监控已停止")
         except Exception as e:
             logger.error(f"停止系统监控失败: {e}")
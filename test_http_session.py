@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+共享HTTP会话测试
+"""
+import asyncio
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from data.http_session import get_shared_session, release_shared_session
+
+BASE_URL = "https://api.example.com"
+
+
+def test_session_shared_and_closed_on_last_release():
+    """同一事件循环内复用会话，最后一个引用释放时关闭"""
+    async def run():
+        first = await get_shared_session(BASE_URL)
+        second = await get_shared_session(BASE_URL)
+        other = await get_shared_session("https://other.example.com")
+        assert first is second
+        assert other is not first
+
+        await release_shared_session(BASE_URL)
+        assert not first.closed
+        await release_shared_session(BASE_URL)
+        assert first.closed
+
+        await release_shared_session("https://other.example.com")
+        assert other.closed
+
+    asyncio.run(run())
+
+
+def test_each_event_loop_gets_its_own_session():
+    """不同事件循环（多次asyncio.run）不复用绑定在旧循环上的会话"""
+    sessions = []
+
+    async def run():
+        session = await get_shared_session(BASE_URL)
+        sessions.append(session)
+        await release_shared_session(BASE_URL)
+
+    asyncio.run(run())
+    asyncio.run(run())
+
+    assert sessions[0] is not sessions[1]
+    assert all(session.closed for session in sessions)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Prometheus监控客户端测试
+"""
+import sys
+import os
+
+import pytest
+from prometheus_client import REGISTRY
+from prometheus_client.metrics import MetricWrapperBase
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from monitoring.prometheus_client import (
+    MAX_TRACKED_SYMBOLS, OTHER_SYMBOL, PrometheusClient, TickSample
+)
+
+
+@pytest.fixture
+def client_factory():
+    """创建客户端，测试结束后从全局注册表注销其指标"""
+    clients = []
+
+    def factory(**kwargs):
+        client = PrometheusClient(**kwargs)
+        clients.append(client)
+        return client
+
+    yield factory
+
+    for client in clients:
+        for metric in vars(client).values():
+            if isinstance(metric, MetricWrapperBase):
+                REGISTRY.unregister(metric)
+
+
+def _price(exchange, symbol):
+    return REGISTRY.get_sample_value(
+        'trading_current_price', {'exchange': exchange, 'symbol': symbol}
+    )
+
+
+def _symbol_labels():
+    return {
+        sample.labels['symbol']
+        for metric in REGISTRY.collect() if metric.name == 'trading_current_price'
+        for sample in metric.samples
+    }
+
+
+def test_untracked_symbols_fold_into_other(client_factory):
+    """配置关注列表时，其余交易对归入other"""
+    client = client_factory(tracked_symbols=["BTCUSDT"])
+
+    client.update_tick("binance", "BTCUSDT", TickSample(50000.0))
+    client.update_tick("binance", "DOGEUSDT", TickSample(0.1))
+    client.update_tick("binance", "SHIBUSDT", TickSample(0.00001))
+
+    assert _price("binance", "BTCUSDT") == 50000.0
+    assert _price("binance", OTHER_SYMBOL) == 0.00001
+    assert _symbol_labels() == {"BTCUSDT", OTHER_SYMBOL}
+
+
+def test_auto_tracking_is_capped(client_factory):
+    """未配置关注列表时最多单独统计MAX_TRACKED_SYMBOLS个交易对"""
+    client = client_factory()
+    symbols = [f"SYM{i}USDT" for i in range(MAX_TRACKED_SYMBOLS + 10)]
+
+    for i, symbol in enumerate(symbols):
+        client.update_tick("okx", symbol, TickSample(float(i)))
+
+    labels = _symbol_labels()
+    assert len(labels) == MAX_TRACKED_SYMBOLS + 1
+    assert set(symbols[:MAX_TRACKED_SYMBOLS]) <= labels
+    assert _price("okx", OTHER_SYMBOL) == float(len(symbols) - 1)
+
+
+def test_pnl_uses_folded_label(client_factory):
+    """盈亏指标与价格使用相同的交易对标签，未上报盈亏时不导出"""
+    client = client_factory(tracked_symbols=["BTCUSDT"])
+
+    client.update_tick("binance", "ETHUSDT", TickSample(3000.0, 1.5, -20.0))
+    client.update_tick("binance", "BTCUSDT", TickSample(50000.0, 2.0))
+
+    assert REGISTRY.get_sample_value(
+        'trading_profit_loss', {'exchange': 'binance', 'symbol': OTHER_SYMBOL}
+    ) == -20.0
+    assert REGISTRY.get_sample_value(
+        'trading_profit_loss', {'exchange': 'binance', 'symbol': 'BTCUSDT'}
+    ) is None
+    assert client.get_metrics_summary()["trading_volume"]["value"] == 3.5
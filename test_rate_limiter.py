@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+令牌桶限流器测试
+"""
+import asyncio
+import sys
+import os
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from execution.rate_limiter import TokenBucket
+
+
+def test_burst_within_capacity_does_not_wait():
+    """容量内的突发请求无需等待"""
+    async def run():
+        bucket = TokenBucket(rate=1.0, capacity=5)
+        start = time.monotonic()
+        for _ in range(5):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) < 0.05
+
+
+def test_concurrent_acquires_complete_in_arrival_order():
+    """并发请求按到达顺序获得令牌，后到的请求不会插队"""
+    async def run():
+        bucket = TokenBucket(rate=50.0, capacity=2)
+        finished = []
+
+        async def worker(i):
+            await bucket.acquire()
+            finished.append(i)
+
+        start = time.monotonic()
+        await asyncio.gather(*[worker(i) for i in range(8)])
+        return finished, time.monotonic() - start
+
+    finished, elapsed = asyncio.run(run())
+
+    assert finished == list(range(8))
+    # 超出容量的6个请求按每秒50个的速度补充令牌
+    assert elapsed >= 6 / 50.0 * 0.9
+
+
+def test_tokens_refill_over_time():
+    """令牌按速度补充且不超过容量"""
+    async def run():
+        bucket = TokenBucket(rate=100.0, capacity=3)
+        for _ in range(3):
+            await bucket.acquire()
+        await asyncio.sleep(0.1)
+        await bucket.acquire(cost=0)
+        return bucket.tokens
+
+    assert asyncio.run(run()) == 3
+
+
+def test_cost_is_deducted():
+    """按cost扣除令牌"""
+    async def run():
+        bucket = TokenBucket(rate=1.0, capacity=10)
+        await bucket.acquire(cost=4)
+        return bucket.tokens
+
+    assert 6 <= asyncio.run(run()) < 6.1
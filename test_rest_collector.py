@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+REST数据采集器K线转换测试
+"""
+import sys
+import os
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from data.rest_collector import KLINE_DTYPE, RESTCollector
+
+# 币安格式K线：数值以字符串给出，时间戳为整数
+RAW_KLINES = [
+    [1700000000000, "37000.1", "37100.5", "36950.0", "37050.2", "12.5",
+     1700000059999, "463127.5", 321, "6.1", "226000.0", "0"],
+    [1700000060000, "37050.2", "37080.0", "37010.3", "37020.0", "8.25",
+     1700000119999, "305418.3", 210, "4.0", "148000.0", "0"],
+]
+
+
+def _collector():
+    return RESTCollector("binance", ["BTCUSDT"])
+
+
+def test_klines_to_structured_array():
+    """K线转换为(ts, o, h, l, c, v)结构化数组，时间戳为int64"""
+    result = _collector()._convert_klines_to_array(RAW_KLINES)
+
+    assert result.dtype == KLINE_DTYPE
+    assert result['ts'].dtype == np.int64
+    np.testing.assert_array_equal(result['ts'], [1700000000000, 1700000060000])
+    np.testing.assert_array_equal(result['o'], [37000.1, 37050.2])
+    np.testing.assert_array_equal(result['h'], [37100.5, 37080.0])
+    np.testing.assert_array_equal(result['l'], [36950.0, 37010.3])
+    np.testing.assert_array_equal(result['c'], [37050.2, 37020.0])
+    np.testing.assert_array_equal(result['v'], [12.5, 8.25])
+
+
+def test_klines_with_numeric_values():
+    """已是数值的K线（如WebSocket推送）同样可以转换"""
+    klines = [[1700000000000, 1.5, 2.0, 1.0, 1.75, 100]]
+
+    result = _collector()._convert_klines_to_array(klines)
+
+    assert result[0]['ts'] == 1700000000000
+    assert result[0]['c'] == 1.75
+    assert result[0]['v'] == 100.0
+
+
+def test_empty_klines():
+    """空K线返回空的结构化数组"""
+    result = _collector()._convert_klines_to_array([])
+
+    assert result.dtype == KLINE_DTYPE
+    assert len(result) == 0
+
+
+def test_klines_to_dataframe():
+    """K线转换为DataFrame时数值列为float64，按时间索引"""
+    df = _collector()._convert_klines_to_dataframe(RAW_KLINES)
+
+    assert list(df.columns) == ['timestamp', 'open', 'high', 'low', 'close', 'volume',
+                                'quote_asset_volume', 'number_of_trades']
+    assert (df.dtypes == np.float64).all()
+    assert df['number_of_trades'].tolist() == [321.0, 210.0]
+    assert str(df.index[0]) == "2023-11-14 22:13:20"
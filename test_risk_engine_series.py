@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+风控引擎价格环形缓冲区测试
+"""
+import sys
+import os
+
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from risk_management.risk_engine import RiskEngine, _MarketSeries
+
+
+def _returns_std(prices):
+    prices = np.asarray(prices)
+    return np.std(np.diff(prices) / prices[:-1])
+
+
+def test_series_before_wrap():
+    """未写满时按顺序返回全部价格"""
+    series = _MarketSeries.create(size=5)
+    for price in (100.0, 101.0, 99.0):
+        series.append(price, 1.0)
+
+    assert series.count == 3
+    np.testing.assert_array_equal(series.recent(), [100.0, 101.0, 99.0])
+    np.testing.assert_array_equal(series.recent(2), [101.0, 99.0])
+    assert series.returns_std() == pytest.approx(_returns_std([100.0, 101.0, 99.0]))
+
+
+def test_series_wraps_and_keeps_latest():
+    """写满后覆盖最旧数据，recent按时间顺序拼接回绕的两段"""
+    series = _MarketSeries.create(size=5)
+    prices = [100.0 + i * (-1) ** i for i in range(13)]
+    for price in prices:
+        series.append(price)
+
+    assert series.count == 5
+    np.testing.assert_array_equal(series.recent(), prices[-5:])
+    np.testing.assert_array_equal(series.recent(3), prices[-3:])
+    np.testing.assert_array_equal(series.recent(100), prices[-5:])
+    # 滚动收益率统计只包含窗口内的收益率
+    assert series.returns_n == 4
+    assert series.returns_std() == pytest.approx(_returns_std(prices[-5:]))
+
+
+def test_series_reset():
+    """reset清空数据和收益率统计量"""
+    series = _MarketSeries.create(size=4)
+    for price in (10.0, 11.0, 12.0, 13.0, 14.0):
+        series.append(price, 2.0)
+
+    series.reset()
+
+    assert series.count == 0
+    assert series.recent().size == 0
+    assert series.returns_n == 0
+    assert series.returns_std() == 0.0
+    assert np.isnan(series.volumes).all()
+
+
+def test_price_history_replaces_existing_history():
+    """重复传入price_history时替换已有历史而不是追加"""
+    engine = RiskEngine({})
+    history = [100.0, 101.0, 102.0, 103.0, 104.0]
+
+    for price in (105.0, 106.0, 107.0):
+        engine.update_market_data("BTCUSDT", {"price": price, "price_history": history})
+
+    series = engine.market_series["BTCUSDT"]
+    np.testing.assert_array_equal(series.recent(), history + [107.0])
+    assert "price_history" not in engine.market_data["BTCUSDT"]
+    assert engine.market_data["BTCUSDT"]["price"] == 107.0
+
+
+def test_price_updates_append_after_seed():
+    """只传price时在已有历史后追加"""
+    engine = RiskEngine({})
+    engine.update_market_data("ETHUSDT", {"price": 3000.0, "price_history": [2990.0, 2995.0]})
+    engine.update_market_data("ETHUSDT", {"price": 3010.0, "volume": 5.0})
+
+    series = engine.market_series["ETHUSDT"]
+    np.testing.assert_array_equal(series.recent(), [2990.0, 2995.0, 3000.0, 3010.0])
+    assert series.volumes[3] == 5.0
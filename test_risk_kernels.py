@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+风险指标计算内核测试
+
+numba编译的循环实现与numpy实现结果应一致（允许浮点舍入误差）
+"""
+import sys
+import os
+
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from risk_management import _risk_kernels as kernels
+
+# 风险评分阈值：VaR、最大回撤、夏普比率（取负）、波动率各三档
+THRESHOLDS = np.array([
+    [0.02, 0.05, 0.10],
+    [0.05, 0.10, 0.20],
+    [-2.0, -1.0, 0.0],
+    [0.20, 0.40, 0.60],
+])
+
+
+def _random_prices(n_assets=5, n_points=250, seed=7):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0005, 0.02, size=(n_assets, n_points - 1))
+    prices = np.empty((n_assets, n_points))
+    prices[:, 0] = rng.uniform(10, 1000, size=n_assets)
+    prices[:, 1:] = prices[:, :1] * np.cumprod(1 + returns, axis=1)
+    weights = rng.dirichlet(np.ones(n_assets))
+    return prices, weights
+
+
+@pytest.mark.parametrize("seed", [1, 7, 42])
+def test_var_kernel_matches_numpy(seed):
+    """VaR、波动率、夏普和索提诺比率与numpy实现一致"""
+    prices, weights = _random_prices(seed=seed)
+    confidences = np.array([0.95, 0.99])
+
+    expected = kernels._var_kernel_numpy(prices, weights, confidences)
+    actual = kernels.var_kernel(prices, weights, confidences)
+
+    np.testing.assert_allclose(actual[0], expected[0], rtol=1e-9)
+    for a, e in zip(actual[1:], expected[1:]):
+        assert a == pytest.approx(e, rel=1e-9)
+
+
+def test_var_kernel_quantiles_match_percentile():
+    """VaR分位数与np.percentile的线性插值一致"""
+    prices, weights = _random_prices(seed=3)
+    confidences = np.array([0.9, 0.95, 0.99])
+    returns = weights @ (np.diff(prices, axis=1) / prices[:, :-1])
+
+    var_values = kernels.var_kernel(prices, weights, confidences)[0]
+
+    np.testing.assert_allclose(var_values, -np.percentile(returns, (1 - confidences) * 100), rtol=1e-9)
+
+
+@pytest.mark.parametrize("metrics", [
+    (0.01, 0.02, 2.5, 0.10),
+    (0.03, 0.12, 0.5, 0.45),
+    (0.20, 0.30, -3.0, 0.90),
+    (0.05, 0.10, -1.0, 0.40),   # 恰好等于阈值不计分
+    (float("nan"), 0.30, float("nan"), 0.90),
+])
+def test_risk_score_matches_numpy(metrics):
+    """风险评分与numpy实现一致，NaN指标不计分"""
+    expected = kernels._risk_score_numpy(*metrics, THRESHOLDS)
+
+    assert kernels.risk_score(*metrics, THRESHOLDS) == expected
+    assert kernels._risk_score_loops(*metrics, THRESHOLDS) == expected
+
+
+@pytest.mark.parametrize("values", [
+    [50000.0, 30000.0, 20000.0],
+    [1.0],
+    [3.5, 0.0, 7.25, 11.0, 2.0],
+    [0.0, 0.0],
+])
+def test_concentration_matches_numpy(values):
+    """总价值、HHI指数和最大权重与numpy实现一致"""
+    values = np.array(values)
+
+    expected = kernels._concentration_numpy(values)
+    actual = kernels.concentration(values)
+
+    assert actual == pytest.approx(expected, rel=1e-12)
+
+
+def test_concentration_values():
+    """集中度计算结果"""
+    total, hhi, max_weight = kernels.concentration(np.array([60.0, 30.0, 10.0]))
+
+    assert total == pytest.approx(100.0)
+    assert hhi == pytest.approx(0.36 + 0.09 + 0.01)
+    assert max_weight == pytest.approx(0.6)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+风险监控滚动协方差测试
+"""
+import asyncio
+import math
+import sys
+import os
+
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from risk_management.risk_engine import RiskEngine, Z_95
+from risk_management.risk_monitor import (
+    MIN_COVARIANCE_PERIODS, VAR_HORIZON_SECONDS, MarketSnapshot, RiskMonitor, _RollingCovariance
+)
+
+PORTFOLIO = {"BTCUSDT": 6000.0, "ETHUSDT": 4000.0}
+
+
+def _price_path(n_points, seed=11):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0, 0.003, size=(n_points - 1, 2))
+    prices = np.empty((n_points, 2))
+    prices[0] = (50000.0, 3000.0)
+    prices[1:] = prices[0] * np.cumprod(1 + returns, axis=0)
+    return prices
+
+
+def _monitor():
+    return RiskMonitor(RiskEngine({}), None)
+
+
+async def _feed(monitor, price_rows):
+    """依次以每行价格作为最新市场数据更新协方差，返回最后一次的结果"""
+    covariance = None
+    for price in price_rows:
+        snapshot = MarketSnapshot(symbols=tuple(PORTFOLIO), volatility=np.zeros(2),
+                                  price=np.asarray(price, dtype=np.float64))
+
+        async def market_data(snapshot=snapshot):
+            return snapshot
+
+        monitor._get_market_data = market_data
+        covariance = await monitor._update_rolling_covariance(PORTFOLIO)
+    return covariance
+
+
+def test_rolling_covariance_matches_window():
+    """滚动协方差与窗口内收益率的样本协方差一致"""
+    rolling = _RollingCovariance(2, lookback=20)
+    rows = np.random.default_rng(5).normal(size=(50, 2))
+    for row in rows:
+        assert rolling.update(row)
+
+    np.testing.assert_allclose(rolling.cov, np.cov(rows[-20:], rowvar=False), rtol=1e-9)
+
+
+def test_non_finite_rows_are_rejected():
+    """含NaN/无穷的收益率行不进入统计量"""
+    rolling = _RollingCovariance(2, lookback=10)
+    rows = np.random.default_rng(6).normal(size=(5, 2))
+    for row in rows:
+        rolling.update(row)
+
+    assert not rolling.update(np.array([np.nan, 0.01]))
+    assert not rolling.update(np.array([np.inf, 0.01]))
+    assert rolling.count == 5
+    np.testing.assert_allclose(rolling.cov, np.cov(rows, rowvar=False), rtol=1e-9)
+
+
+def test_covariance_needs_min_periods_and_uses_var_horizon():
+    """样本不足时返回None（使用历史模拟法），之后按监控间隔换算到VaR期限"""
+    monitor = _monitor()
+    prices = _price_path(MIN_COVARIANCE_PERIODS + 1)
+
+    assert asyncio.run(_feed(monitor, prices[:-1])) is None
+    covariance = asyncio.run(_feed(monitor, prices[-1:]))
+
+    interval = monitor.monitoring_config["portfolio_risk"]["interval"]
+    returns = prices[1:] / prices[:-1] - 1.0
+    expected = np.cov(returns, rowvar=False) * (VAR_HORIZON_SECONDS / interval)
+    np.testing.assert_allclose(covariance, expected, rtol=1e-9)
+
+    metrics = asyncio.run(monitor.risk_engine.monitor_portfolio_risk(PORTFOLIO, covariance))
+    exposures = np.array(list(PORTFOLIO.values()))
+    assert metrics["var_95"] == pytest.approx(Z_95 * math.sqrt(exposures @ expected @ exposures))
+
+
+@pytest.mark.parametrize("bad_price", [0.0, -1.0, float("nan"), float("inf")])
+def test_invalid_prices_do_not_poison_covariance(bad_price):
+    """价格缺失或非正时跳过该次采样，协方差保持有限"""
+    monitor = _monitor()
+    prices = _price_path(MIN_COVARIANCE_PERIODS + 6)
+    bad_row = prices[10].copy()
+    bad_row[0] = bad_price
+    rows = np.vstack((prices[:10], bad_row, prices[10:]))
+
+    covariance = asyncio.run(_feed(monitor, rows))
+
+    assert covariance is not None
+    assert np.isfinite(covariance).all()
+    assert monitor._rolling.count == len(prices) - 1
+    assert (monitor._last_prices > 0).all()
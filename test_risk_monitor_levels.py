@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+风险监控阈值查表测试
+"""
+import sys
+import os
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config.risk_config import RiskLevel
+from risk_management.risk_monitor import (
+    CONCENTRATION_LEVELS, CONCENTRATION_THRESHOLDS,
+    LIQUIDITY_SCORE_LEVELS, LIQUIDITY_SCORE_THRESHOLDS,
+    MARKET_VOLATILITY_LEVELS, MARKET_VOLATILITY_THRESHOLDS,
+    PORTFOLIO_VAR_LEVELS, PORTFOLIO_VAR_THRESHOLDS,
+    _classify, _level_of,
+)
+
+
+def test_volatility_levels():
+    """波动率严格大于阈值才升级"""
+    values = np.array([0.05, 0.1, 0.15, 0.2, 0.35])
+
+    hits, level_index = _classify(values, MARKET_VOLATILITY_THRESHOLDS,
+                                  MARKET_VOLATILITY_LEVELS, side="left")
+
+    assert hits.tolist() == [2, 3, 4]
+    assert [MARKET_VOLATILITY_LEVELS[level_index[i]] for i in hits] == [
+        RiskLevel.MEDIUM, RiskLevel.MEDIUM, RiskLevel.HIGH
+    ]
+
+
+def test_liquidity_levels():
+    """流动性评分低于阈值时触发，达到阈值即进入上一区间"""
+    values = np.array([0.1, 0.3, 0.4, 0.5, 0.9])
+
+    hits, level_index = _classify(values, LIQUIDITY_SCORE_THRESHOLDS,
+                                  LIQUIDITY_SCORE_LEVELS, side="right")
+
+    assert hits.tolist() == [0, 1, 2]
+    assert [LIQUIDITY_SCORE_LEVELS[level_index[i]] for i in hits] == [
+        RiskLevel.HIGH, RiskLevel.MEDIUM, RiskLevel.MEDIUM
+    ]
+
+
+def test_non_finite_values_do_not_trigger():
+    """NaN和无穷值不触发警报"""
+    values = np.array([np.nan, 0.5, np.inf, -np.inf])
+
+    hits, _ = _classify(values, MARKET_VOLATILITY_THRESHOLDS,
+                        MARKET_VOLATILITY_LEVELS, side="left")
+    assert hits.tolist() == [1]
+
+    hits, _ = _classify(values[[0, 2, 3]], LIQUIDITY_SCORE_THRESHOLDS,
+                        LIQUIDITY_SCORE_LEVELS, side="right")
+    assert hits.tolist() == []
+
+
+def test_single_value_levels():
+    """组合VaR和集中度的单值查表，非有限值返回None"""
+    assert _level_of(500.0, PORTFOLIO_VAR_THRESHOLDS, PORTFOLIO_VAR_LEVELS, side="left") is None
+    assert _level_of(1500.0, PORTFOLIO_VAR_THRESHOLDS, PORTFOLIO_VAR_LEVELS, side="left") == RiskLevel.HIGH
+    assert _level_of(0.5, CONCENTRATION_THRESHOLDS, CONCENTRATION_LEVELS, side="left") == RiskLevel.MEDIUM
+    assert _level_of(float("nan"), PORTFOLIO_VAR_THRESHOLDS, PORTFOLIO_VAR_LEVELS, side="left") is None
+    assert _level_of(float("nan"), CONCENTRATION_THRESHOLDS, CONCENTRATION_LEVELS, side="left") is None
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+风险监控状态与摘要测试
+"""
+import asyncio
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from risk_management.risk_engine import RiskEngine
+from risk_management.risk_monitor import RiskMonitor
+
+
+def _monitor_with_alerts():
+    engine = RiskEngine({})
+    monitor = RiskMonitor(engine, None)
+    engine._create_alert("market", "medium", "波动率偏高", symbol="BTCUSDT", value=0.15, threshold=0.1)
+    engine._create_alert("position", "low", "仓位偏大", symbol="ETHUSDT")
+    return engine, monitor
+
+
+def test_monitoring_status_counts_active_alerts():
+    """监控状态中的活跃警报数与风险引擎一致，清除后归零"""
+    async def run():
+        engine, monitor = _monitor_with_alerts()
+        before = dict(await monitor.get_monitoring_status())
+        engine.clear_alerts(older_than_hours=0)
+        after = dict(await monitor.get_monitoring_status())
+        return before, after
+
+    before, after = asyncio.run(run())
+
+    assert before == {
+        "is_running": False,
+        "monitoring_tasks": 0,
+        "active_alerts": 2,
+        "risk_events": 0,
+        "subscribers": 0
+    }
+    assert after["active_alerts"] == 0
+
+
+def test_risk_summary():
+    """风险摘要包含组合指标、最近警报和监控状态"""
+    async def run():
+        _, monitor = _monitor_with_alerts()
+        return await monitor.get_risk_summary()
+
+    summary = asyncio.run(run())
+
+    assert summary["portfolio_value"] == 10000
+    assert summary["risk_metrics"]["concentration_risk"] == 0.5
+    assert [(a["level"], a["type"], a["symbol"]) for a in summary["active_alerts"]] == [
+        ("medium", "market", "BTCUSDT"),
+        ("low", "position", "ETHUSDT"),
+    ]
+    assert summary["monitoring_status"]["active_alerts"] == 2
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+交易引擎批量下单测试
+"""
+import asyncio
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from execution.trading_engine import TradingEngine
+
+
+class FakeTradingEngine(TradingEngine):
+    """替换 execute_trade 的交易引擎，记录并发数并按需抛出异常"""
+
+    def __init__(self, failing_symbols=(), delay=0.01):
+        self.failing_symbols = set(failing_symbols)
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def execute_trade(self, symbol, side, quantity, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if symbol in self.failing_symbols:
+                raise Exception(f"交易执行失败: {symbol} 被拒绝")
+            return {"success": True, "symbol": symbol, "side": side, "quantity": quantity}
+        finally:
+            self.in_flight -= 1
+
+
+def _orders(count):
+    return [
+        {"symbol": f"SYM{i}/USDT", "side": "buy", "quantity": float(i + 1)}
+        for i in range(count)
+    ]
+
+
+def test_failing_order_does_not_abort_batch():
+    """单个订单失败时其余订单照常执行，结果保持输入顺序"""
+    engine = FakeTradingEngine(failing_symbols={"SYM1/USDT"})
+    orders = _orders(3)
+
+    results = asyncio.run(engine.execute_trades_batch(orders))
+
+    assert [r["symbol"] for r in results] == [o["symbol"] for o in orders]
+    assert [r["success"] for r in results] == [True, False, True]
+    assert "SYM1/USDT 被拒绝" in results[1]["error"]
+    assert results[1]["quantity"] == 2.0
+
+
+def test_batch_concurrency_is_bounded():
+    """大批量订单同时进行的数量不超过并发上限"""
+    engine = FakeTradingEngine()
+
+    results = asyncio.run(engine.execute_trades_batch(_orders(25), concurrency=4))
+
+    assert all(r["success"] for r in results)
+    assert engine.max_in_flight == 4
+
+
+if __name__ == "__main__":
+    test_failing_order_does_not_abort_batch()
+    test_batch_concurrency_is_bounded()
+    print("✅ 批量下单测试通过")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+交易引擎交易记录写入测试
+"""
+import asyncio
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from execution.trading_engine import TRADE_FLUSH_BATCH_SIZE, TradingEngine
+
+
+class RecordingTradingEngine(TradingEngine):
+    """不连接交易所和数据库的交易引擎，记录每次批量写入的交易记录"""
+
+    def __init__(self):
+        self.active_exchanges = {}
+        self._sessions = []
+        self._connector = None
+        self.flushed = []
+
+    def start_writer(self):
+        self._trade_wal = asyncio.Queue()
+        self._trade_writer_task = asyncio.create_task(self._trade_writer())
+
+    def _flush_trades(self, rows):
+        self.flushed.append(list(rows))
+
+
+def _order(i):
+    return {
+        "id": i, "symbol": "BTC/USDT", "side": "buy", "type": "market",
+        "amount": 0.1, "price": 50000.0, "filled": 0.1, "average": 50000.0,
+        "status": "closed"
+    }
+
+
+def _flushed_order_ids(engine):
+    return [row["exchange_order_id"] for batch in engine.flushed for row in batch]
+
+
+def test_shutdown_flushes_batch_in_progress():
+    """写入任务已取出记录、正在等待凑批时停止，记录不丢失"""
+    async def run():
+        engine = RecordingTradingEngine()
+        engine.start_writer()
+        await engine._record_trade(_order(1), 1, "binance")
+        # 让写入任务取出这条记录并进入凑批等待
+        await asyncio.sleep(0)
+        assert engine._trade_wal.empty()
+        await engine.shutdown()
+        return engine
+
+    engine = asyncio.run(run())
+
+    assert _flushed_order_ids(engine) == ["1"]
+    assert engine._trade_writer_task is None
+
+
+def test_shutdown_flushes_queued_trades():
+    """停止时队列中的全部记录（含成功和失败的交易）按顺序写入"""
+    async def run():
+        engine = RecordingTradingEngine()
+        engine.start_writer()
+        for i in range(TRADE_FLUSH_BATCH_SIZE + 5):
+            await engine._record_trade(_order(i), 1, "binance")
+        await engine._record_failed_trade(
+            "BTC/USDT", "sell", 0.2, "limit", 51000.0, "余额不足", 1, "binance"
+        )
+        await engine.shutdown()
+        return engine
+
+    engine = asyncio.run(run())
+
+    rows = [row for batch in engine.flushed for row in batch]
+    assert len(rows) == TRADE_FLUSH_BATCH_SIZE + 6
+    assert all(len(batch) <= TRADE_FLUSH_BATCH_SIZE for batch in engine.flushed)
+    assert _flushed_order_ids(engine)[:TRADE_FLUSH_BATCH_SIZE + 5] == [
+        str(i) for i in range(TRADE_FLUSH_BATCH_SIZE + 5)
+    ]
+    assert rows[-1]["status"] == "failed"
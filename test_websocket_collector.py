@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+WebSocket采集器K线缓冲区测试
+"""
+import asyncio
+import sys
+import os
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from data.websocket_collector import CANDLE_INTERVAL_MS, WebSocketCollector
+from data.rest_collector import RESTCollector
+
+OKX_URL = "wss://ws.okx.com:8443/ws/v5/public"
+BINANCE_URL = "wss://stream.binance.com:9443/ws"
+
+
+def _candle(ts, close="100.0"):
+    return [str(ts), "99.0", "101.0", "98.0", close, "10.0", "1000.0", "1000.0", "0"]
+
+
+def _recent_timestamps(count):
+    """最近count根1分钟K线的开盘时间（升序）"""
+    last = int(time.time() * 1000) // CANDLE_INTERVAL_MS * CANDLE_INTERVAL_MS
+    return [last - (count - 1 - i) * CANDLE_INTERVAL_MS for i in range(count)]
+
+
+def _candle_message(symbol, *candles):
+    return {"arg": {"channel": "candle1m", "instId": symbol}, "data": list(candles)}
+
+
+def test_okx_candles_use_business_endpoint():
+    """欧意K线订阅走business端点"""
+    collector = WebSocketCollector("okx", ["BTC-USDT"], OKX_URL)
+
+    assert collector.streams_candles
+    assert collector._candle_url == "wss://ws.okx.com:8443/ws/v5/business"
+
+
+def test_candle_push_updates_and_appends():
+    """同一开盘时间的推送覆盖最新K线，新K线追加，旧K线忽略"""
+    collector = WebSocketCollector("okx", ["BTC-USDT"], OKX_URL)
+    t0, t1 = _recent_timestamps(2)
+
+    collector._process_okx_candle(_candle_message("BTC-USDT", _candle(t0, "100.0")))
+    collector._process_okx_candle(_candle_message("BTC-USDT", _candle(t0, "100.5")))
+    collector._process_okx_candle(_candle_message("BTC-USDT", _candle(t1, "101.0")))
+    collector._process_okx_candle(_candle_message("BTC-USDT", _candle(t0, "90.0")))
+
+    candles = collector.get_live_candles("BTC-USDT")
+    assert [(int(c[0]), c[4]) for c in candles] == [(t0, "100.5"), (t1, "101.0")]
+
+
+def test_stale_candles_are_not_served():
+    """推送中断（最新K线过旧）时不返回缓冲区数据"""
+    collector = WebSocketCollector("okx", ["BTC-USDT"], OKX_URL)
+    stale = _recent_timestamps(1)[0] - 10 * CANDLE_INTERVAL_MS
+    collector._process_okx_candle(_candle_message("BTC-USDT", _candle(stale)))
+
+    assert collector.get_live_candles("BTC-USDT") == []
+
+
+def test_seed_replaces_older_buffer_only():
+    """REST数据更新时替换缓冲区，缓冲区已有同样新的推送时保留"""
+    collector = WebSocketCollector("okx", ["BTC-USDT"], OKX_URL)
+    timestamps = _recent_timestamps(5)
+    collector._process_okx_candle(_candle_message("BTC-USDT", _candle(timestamps[0])))
+
+    collector.seed_candles("BTC-USDT", [_candle(ts) for ts in timestamps[:4]])
+    assert [int(c[0]) for c in collector.get_candles("BTC-USDT")] == timestamps[:4]
+
+    collector._process_okx_candle(_candle_message("BTC-USDT", _candle(timestamps[4], "105.0")))
+    collector.seed_candles("BTC-USDT", [_candle(ts) for ts in timestamps[2:]])
+    assert collector.get_candles("BTC-USDT")[-1][4] == "105.0"
+    assert len(collector.get_candles("BTC-USDT")) == 5
+
+
+def test_binance_does_not_stream_candles():
+    """不推送K线的交易所不填充缓冲区，始终走REST"""
+    collector = WebSocketCollector("binance", ["BTCUSDT"], BINANCE_URL)
+    collector.seed_candles("BTCUSDT", [_candle(ts) for ts in _recent_timestamps(3)])
+
+    assert not collector.streams_candles
+    assert collector.get_live_candles("BTCUSDT") == []
+
+
+class FakeClient:
+    """按新到旧顺序返回K线的REST客户端（与欧意一致）"""
+
+    def __init__(self, klines):
+        self.klines = klines
+        self.calls = 0
+
+    async def get_klines(self, symbol, interval, limit=100):
+        self.calls += 1
+        return list(reversed(self.klines))[:limit]
+
+
+def test_rest_klines_sorted_and_seed_buffer():
+    """无实时K线时走REST，结果按时间升序并填充推送缓冲区"""
+    ws_collector = WebSocketCollector("okx", ["BTC-USDT"], OKX_URL)
+    collector = RESTCollector("okx", ["BTC-USDT"], ws_collector=ws_collector)
+    klines = [_candle(ts) for ts in _recent_timestamps(3)]
+    collector.client = FakeClient(klines)
+
+    result = asyncio.run(collector._get_klines("BTC-USDT"))
+
+    assert result == klines
+    assert ws_collector.get_candles("BTC-USDT") == klines
+
+
+def test_live_candles_skip_rest():
+    """实时K线正常时直接使用缓冲区，不请求REST"""
+    ws_collector = WebSocketCollector("okx", ["BTC-USDT"], OKX_URL)
+    collector = RESTCollector("okx", ["BTC-USDT"], ws_collector=ws_collector)
+    collector.client = FakeClient([])
+    timestamps = _recent_timestamps(3)
+    ws_collector._process_okx_candle(_candle_message("BTC-USDT", *[_candle(ts) for ts in timestamps]))
+
+    result = asyncio.run(collector._get_klines("BTC-USDT", limit=2))
+
+    assert [int(c[0]) for c in result] == timestamps[1:]
+    assert collector.client.calls == 0